@@ -1,15 +1,96 @@
-"""Shared AI clients — initialized once at import time."""
+"""Shared AI clients and HTTP connection pools — initialized once at import time."""
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import openai
+import requests
 from openai import OpenAI
-from config import VOZA_MODE, OPENAI_API_KEY, OLLAMA_BASE_URL
+from requests.adapters import HTTPAdapter
+
+from config import VOZA_MODE, OPENAI_API_KEY, OLLAMA_BASE_URL, WHISPER_SERVER_URL, PREFIX_REUSE
+
+# Keep idle connections this long instead of httpx's 5-second default, so a
+# connection opened by preconnect() (or the previous dictation) is still
+# pooled when the next request goes out.
+_KEEPALIVE_SECONDS = 120
+
+# preconnect() skips work if it ran this recently — back-to-back presses
+# don't need a second handshake.
+_PRECONNECT_INTERVAL = 2.0
+_PRECONNECT_TIMEOUT = 3.0
+
+_http_clients = []  # httpx clients backing the SDK clients, for preconnect()
+
+
+def _openai_client(**kwargs) -> OpenAI:
+    """OpenAI SDK client on its own keep-alive httpx pool."""
+    # DefaultHttpxClient keeps the SDK's timeout/redirect defaults (openai>=1.17)
+    http_cls = getattr(openai, "DefaultHttpxClient", httpx.Client)
+    http_client = http_cls(limits=httpx.Limits(
+        max_connections=20,
+        max_keepalive_connections=10,
+        keepalive_expiry=_KEEPALIVE_SECONDS,
+    ))
+    api = OpenAI(http_client=http_client, **kwargs)
+    _http_clients.append((http_client, str(api.base_url)))
+    return api
+
 
 if VOZA_MODE == "local":
-    client = OpenAI(
+    client = _openai_client(
         base_url=f"{OLLAMA_BASE_URL}/v1",
         api_key="ollama",
     )
     # Cloud fallback when local servers are unreachable (requires a real key)
-    fallback_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+    fallback_client = _openai_client(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
 else:
-    client = OpenAI(api_key=OPENAI_API_KEY)
+    client = _openai_client(api_key=OPENAI_API_KEY)
     fallback_client = None
+
+# Plain-HTTP calls (whisper-server, Ollama's native API) share one pooled
+# session, so each dictation reuses a connection instead of opening a new one.
+http = requests.Session()
+http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+_preconnect_lock = threading.Lock()
+_last_preconnect = 0.0
+# One preconnect runs at a time (see _preconnect_lock), on this one thread
+_preconnect_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voza-preconnect")
+
+
+def preconnect():
+    """Warm every backend connection in the background.
+
+    Called on hotkey press, so the TCP (and TLS) handshakes overlap with the
+    user talking instead of landing after release. Returns immediately.
+    """
+    global _last_preconnect
+    now = time.monotonic()
+    if now - _last_preconnect < _PRECONNECT_INTERVAL or not _preconnect_lock.acquire(blocking=False):
+        return
+    _last_preconnect = now
+    _preconnect_pool.submit(_preconnect)
+
+
+def _preconnect():
+    try:
+        # Any response (404/401 included) leaves an open connection in the pool
+        for http_client, base_url in _http_clients:
+            try:
+                http_client.head(base_url, timeout=_PRECONNECT_TIMEOUT)
+            except Exception:
+                pass  # the real request will report (or fall back from) the error
+        if VOZA_MODE == "local":
+            # With prefix reuse, cleanup goes to Ollama's native API over `http` too
+            urls = [WHISPER_SERVER_URL] + ([OLLAMA_BASE_URL] if PREFIX_REUSE else [])
+            for url in urls:
+                try:
+                    http.head(url, timeout=_PRECONNECT_TIMEOUT)
+                except Exception:
+                    pass
+    finally:
+        _preconnect_lock.release()
@@ -0,0 +1,117 @@
+"""Bounded LRU cache for text results, optionally persisted under ~/.voza/."""
+
+import os
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """String-to-string LRU bounded by total size, with optional disk backing.
+
+    Memory holds up to `max_bytes` of keys+values; the least recently used
+    entries are evicted first. With `disk_dir`, every entry is also written
+    there as one file, and the directory is trimmed (oldest access first) to
+    `max_disk_bytes`, so entries survive restarts. Keys must be filename-safe
+    (e.g. hex digests). Thread-safe.
+    """
+
+    def __init__(self, name: str, max_bytes: int, disk_dir=None, max_disk_bytes=0):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._disk_dir = disk_dir
+        self._max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        if disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+            except OSError:
+                self._disk_dir = None  # memory-only rather than failing startup
+
+    def get(self, key: str):
+        """Cached value for `key`, or None. Counts a hit or miss."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+        if value is None:
+            value = self._read_disk(key)
+            if value is not None:
+                self._remember(key, value)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, key: str, value: str):
+        self._remember(key, value)
+        self._write_disk(key, value)
+
+    def stats(self) -> str:
+        return f"{self.hits} hits / {self.misses} misses"
+
+    def _remember(self, key: str, value: str):
+        size = len(key) + len(value)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(key) + len(old)
+            self._entries[key] = value
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                old_key, old_value = self._entries.popitem(last=False)
+                self._bytes -= len(old_key) + len(old_value)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._disk_dir, key + ".txt")
+
+    def _read_disk(self, key: str):
+        if not self._disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)  # mtime doubles as last-access time for eviction
+            return value
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, value: str):
+        if not self._disk_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp, path)
+            self._evict_disk()
+        except OSError:
+            pass  # the cache is an optimization; losing an entry is fine
+
+    def _evict_disk(self):
+        files = []
+        total = 0
+        with os.scandir(self._disk_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".txt"):
+                    st = entry.stat()
+                    files.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self._max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
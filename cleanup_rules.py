@@ -0,0 +1,215 @@
+"""Deterministic transcript cleanup: the mechanical rules of CLEANUP_SYSTEM_PROMPT.
+
+clean() removes hesitation fillers (English and Spanish), turns spoken
+punctuation into symbols, formats spoken number sequences as digits, and fixes
+capitalization, all with precompiled regexes (microseconds per transcript).
+needs_llm() flags transcripts that need judgment the rules can't make
+(ambiguous fillers, self-corrections, spelled-out words, run-on sentences,
+dictated code), so only those pay for an LLM round trip.
+"""
+
+import re
+
+# Dictations up to this many words skip the LLM when needs_llm() finds
+# nothing for it to do. Past this, odds are something needs judgment anyway.
+MAX_WORDS = 60
+
+# Pure hesitation sounds — never words, safe to drop anywhere, with the commas
+# Whisper puts around them.
+_FILLER = re.compile(
+    r"(?:,\s*)?(?<![\w'-])(?:u+m+|u+h+|u+h+m+|e+r+m+|h+m+|m{2,}|e+h+|e+h+m+)(?![\w'-])(?:\s*,)?",
+    re.IGNORECASE,
+)
+
+# Spoken punctuation, longest phrases first so "punto y coma" beats "punto".
+_SPOKEN = {
+    "new paragraph": "\n\n",
+    "nuevo párrafo": "\n\n",
+    "punto y aparte": ".\n\n",
+    "new line": "\n",
+    "nueva línea": "\n",
+    "question mark": "?",
+    "signo de interrogación": "?",
+    "exclamation point": "!",
+    "exclamation mark": "!",
+    "signo de exclamación": "!",
+    "punto y coma": ";",
+    "punto y seguido": ".",
+    "dos puntos": ":",
+    "semicolon": ";",
+    "full stop": ".",
+    "period": ".",
+    "comma": ",",
+    "colon": ":",
+    "punto": ".",
+    "coma": ",",
+}
+_SPOKEN_RE = re.compile(
+    r"[,.]?[ \t]*(?<![\w-])("
+    + "|".join(re.escape(k) for k in sorted(_SPOKEN, key=len, reverse=True))
+    + r")(?![\w-])([,.!?]?)[ \t]*",
+    re.IGNORECASE,
+)
+# Most of these are also ordinary words ("trial period", "que coma", "cierto
+# punto"), so one only counts as punctuation where it ends the dictation, a
+# line, or runs into a capitalized word (a new sentence) — anywhere else it
+# is left for the LLM (see needs_llm()). Even then it is meant literally
+# after these ("a period", "que coma", "por dos puntos") or before these
+# ("period of time", "punto de vista").
+_LITERAL_BEFORE = {
+    "a", "an", "the", "this", "that", "each", "every", "one", "its", "my", "your",
+    "her", "his", "our", "their",
+    "el", "la", "un", "una", "este", "esta", "ese", "esa", "cada", "en", "al", "del", "su",
+    "que", "se", "lo", "le", "no", "cierto", "por",
+}
+_LITERAL_AFTER = {"of", "de", "del", "for", "para"}
+_SPOKEN_WORD = re.compile(
+    r"(?<![\w-])(?:" + "|".join(re.escape(k) for k in _SPOKEN) + r")(?![\w-])", re.IGNORECASE,
+)
+
+_NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+    "cero": "0", "uno": "1", "dos": "2", "tres": "3", "cuatro": "4",
+    "cinco": "5", "seis": "6", "siete": "7", "ocho": "8", "nueve": "9",
+}
+_NUM = r"(?:" + "|".join(_NUMBER_WORDS) + r"|\d+)"
+# Three or more numbers in a row: "one two three four" → "1, 2, 3, 4"
+_NUMBER_RUN = re.compile(
+    rf"(?<!\w)(?<!\d\.){_NUM}(?:[ \t]*,?[ \t]+{_NUM}){{2,}}(?!\w|\.\d)", re.IGNORECASE,
+)
+_NUMBER_SPLIT = re.compile(r"[ \t]*,?[ \t]+")
+
+_SPACE_BEFORE_PUNCT = re.compile(r"[ \t]+([,.;:!?])")
+_REPEATED_PUNCT = re.compile(r"([,;:])[,;:]+|[,;:]+([.!?])|([.!?])[,.;:]+")
+_MULTI_SPACE = re.compile(r"[ \t]{2,}")
+_LEADING_PUNCT = re.compile(r"^[\s,.;:]+|(?<=\n)[ \t,.;:]+")
+_TRAILING_SPACE = re.compile(r"[ \t]+(?=\n)")
+# A word with a capital inside ("iPhone", "eBay") keeps its own casing, and
+# so does a snake_case identifier.
+# A period ending one of these doesn't start a new sentence ("e.g. this")
+_ABBREVIATION = re.compile(
+    r"(?<![\w.])(?:[a-z]\.){2,}$|(?<!\w)(?:etc|vs|approx|mr|mrs|ms|dr|sr|sra)\.$", re.IGNORECASE,
+)
+_SENTENCE_START = re.compile(r"(^|[.!?]\s+|\n\s*)([¿¡\"'(]*)([a-záéíóúñü])(?!\w*[A-ZÁÉÍÓÚÑÜ_])")
+_LOWER_I = re.compile(r"(?<![\w'-])i(?=(?:'(?:m|ve|ll|d|s))?(?![\w-]))")
+# A lone "i" in dictated code ("for i in range", "i equals zero") is a
+# variable, not the pronoun: it stays lowercase.
+_CODE_I = re.compile(
+    r"(?<![\w'-])(?:for|let|var|int)\s+(i)(?![\w'-])"
+    r"|(?<![\w'-])(i)\s*(?:in|equals|plus|minus)(?![\w'-])|(?<![\w'-])(i)\s*[=<>+\-*/\[(]",
+    re.IGNORECASE,
+)
+
+# needs_llm(): patterns that take judgment. Fillers that are also real words
+# only count in the comma-delimited positions Whisper gives a filler.
+_AMBIGUOUS = re.compile(
+    r"(?<!\w)(?:you know|i mean|kind of|sort of|basically|literally|o sea|como que|digamos)(?!\w)"
+    r"|,\s*(?:like|actually|pues|este|bueno)\b|\b(?:like|actually|pues|este|bueno),"
+    r"|(?:^|[.!?]\s+)(?:so|bueno|pues)\b",
+    re.IGNORECASE,
+)
+_SELF_CORRECTION = re.compile(
+    r"(?<!\w)(?:sorry|i meant|wait|no no|scratch that|i mean|rather"
+    r"|quise decir|perdón|mejor dicho|digo|no, no)(?!\w)",
+    re.IGNORECASE,
+)
+_SPELLED = re.compile(r"(?<!\w)(?:[a-z][ .-]+){2,}[a-z](?!\w)", re.IGNORECASE)
+# Code or identifiers: symbols and snake_case the rules don't format
+_CODE = re.compile(r"[=(){}\[\]<>]|[a-z0-9]_[a-z0-9]", re.IGNORECASE)
+_SENTENCES = re.compile(r"[.!?\n]+")
+_SPANISH = re.compile(r"[ñáéíóú¿¡]|\b(?:que|los|las|por|para|pero|está|es|una?)\b", re.IGNORECASE)
+# A sentence this long without punctuation, or chaining this many "and"s, is
+# a run-on for the LLM to split.
+_RUN_ON_WORDS = 30
+_RUN_ON_ANDS = 3
+
+
+def clean(text: str) -> str:
+    """Apply the deterministic cleanup rules to a raw transcript."""
+    text = _FILLER.sub(" ", text)
+    text = _SPOKEN_RE.sub(_spoken, text)
+    text = _NUMBER_RUN.sub(_number_run, text)
+    text = _SPACE_BEFORE_PUNCT.sub(r"\1", text)
+    text = _REPEATED_PUNCT.sub(lambda m: m.group(1) or m.group(2) or m.group(3), text)
+    text = _MULTI_SPACE.sub(" ", text)
+    text = _TRAILING_SPACE.sub("", text)
+    text = _LEADING_PUNCT.sub("", text)
+    # Case changes keep every offset, so the variables found here stay put
+    code = {m.start(m.lastindex) for m in _CODE_I.finditer(text)}
+    text = _SENTENCE_START.sub(
+        lambda m: m.group(0) if m.start(3) in code or _ABBREVIATION.search(m.string, 0, m.start(1) + 1)
+        else m.group(1) + m.group(2) + m.group(3).upper(),
+        text,
+    )
+    text = _LOWER_I.sub(lambda m: "i" if m.start() in code else "I", text)
+    return text.strip()
+
+
+def needs_llm(raw_text: str) -> bool:
+    """Whether a transcript needs fixes beyond clean() — judgment calls for the LLM.
+
+    Works on raw or clean()ed text; pass the cleaned text so punctuation that
+    was spoken ("question mark") counts too.
+    """
+    if len(raw_text.split()) > MAX_WORDS:
+        return True
+    if _AMBIGUOUS.search(raw_text) or _SELF_CORRECTION.search(raw_text) or _SPELLED.search(raw_text):
+        return True
+    if _CODE_I.search(raw_text) or _CODE.search(raw_text):
+        return True  # dictated code: formatting it takes judgment
+    if _SPOKEN_WORD.search(raw_text):
+        return True  # clean() couldn't tell whether it was punctuation or a word
+    for sentence in _SENTENCES.split(raw_text):
+        words = sentence.lower().split()
+        if len(words) > _RUN_ON_WORDS or words.count("and") + words.count("y") >= _RUN_ON_ANDS:
+            return True
+    # Spanish questions/exclamations need their opening ¿ ¡
+    if (("?" in raw_text and "¿" not in raw_text) or ("!" in raw_text and "¡" not in raw_text)) \
+            and _SPANISH.search(raw_text):
+        return True
+    return False
+
+
+def _spoken(m: re.Match) -> str:
+    before = m.string[:m.start(1)].split()
+    after = m.string[m.end():].split(None, 1)
+    prev_word = before[-1].lower().strip(",.") if before else ""
+    next_word = after[0].strip(",.¿¡\"'(") if after else ""
+    ends = not next_word or m.string[m.end():m.end() + 1] == "\n" or next_word[:1].isupper()
+    if not ends or prev_word in _LITERAL_BEFORE or (next_word.lower() in _LITERAL_AFTER and not m.group(2)):
+        return m.group(0)  # a word, not a command (or can't tell)
+    symbol = _SPOKEN[m.group(1).lower()]
+    if "\n" in symbol:
+        return symbol
+    return symbol + " "
+
+
+def _number_run(m: re.Match) -> str:
+    parts = _NUMBER_SPLIT.split(m.group(0))
+    return ", ".join(_NUMBER_WORDS.get(p.lower(), p) for p in parts)
+
+
+# Regression cases (python -m doctest cleanup_rules.py): ordinary words that
+# are also spoken punctuation stay put and go to the LLM.
+__test__ = {"spoken punctuation": """
+>>> for text in ["Quiero que coma más verduras", "No me gusta que coma tanto azúcar",
+...              "Estoy de acuerdo hasta cierto punto", "Ganamos por dos puntos",
+...              "The trial period ends on Monday", "Her period started yesterday",
+...              "Our new line launches next week"]:
+...     cleaned = clean(text)
+...     print(cleaned == text, needs_llm(cleaned))
+True True
+True True
+True True
+True True
+True True
+True True
+True True
+>>> clean("e.g. this works")
+'E.g. this works'
+>>> clean("I went home period Then we ate comma")
+'I went home. Then we ate,'
+>>> clean("Is it ready question mark")
+'Is it ready?'
+"""}
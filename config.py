@@ -1,13 +1,38 @@
+import json
 import os
 import sys
+import threading
 import time
 
-import sounddevice as sd
-
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower().strip() in ("1", "true", "yes", "on")
+
+
+def _env_duration(name: str, default: str):
+    """An Ollama keep-alive: seconds as a number, or a duration string ("30m") as is."""
+    # Ollama parses a string with Go's time.ParseDuration, which rejects "300" or "-1"
+    raw = os.getenv(name, default).strip()
+    try:
+        number = float(raw)
+    except ValueError:
+        return raw
+    return int(number) if number.is_integer() else number
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.getenv(name, "").strip()
+    try:
+        return float(raw) if raw else default
+    except ValueError:
+        print(f"  Warning: {name}={raw!r} is not a number. Using {default}.")
+        return default
+
+
 VOZA_MODE = os.getenv("VOZA_MODE", "openai").lower().strip()
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
@@ -20,58 +45,225 @@ WHISPER_SERVER_URL = os.getenv("WHISPER_SERVER_URL", "http://localhost:8080")
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 LOCAL_CLEANUP_MODEL = os.getenv("LOCAL_CLEANUP_MODEL", "gemma4:e4b")
 
+# Warm whisper-server and the Ollama model at startup and re-warm them before
+# Ollama's idle unload, so dictation never waits for a model load. The
+# keep-alive (Ollama duration syntax, e.g. "30m", "-1" for forever) is how
+# long Ollama keeps the model after each warm-up (and, with PREFIX_REUSE,
+# each cleanup request), and sets when the next re-warm is due. A bare number
+# is seconds.
+KEEP_WARM = _env_flag("VOZA_KEEP_WARM", "true")
+OLLAMA_KEEP_ALIVE = _env_duration("VOZA_OLLAMA_KEEP_ALIVE", "30m")
+
+# Reuse the evaluated cleanup prompt prefix across requests: local cleanup goes
+# through Ollama's native chat API (keep-alive + prefix warm-up) and cloud
+# requests carry a stable prompt_cache_key. Set false to compare first-token
+# latency against the plain OpenAI-compatible requests.
+PREFIX_REUSE = _env_flag("VOZA_PREFIX_REUSE", "true")
+
+# Hedged requests (local mode with a cloud fallback): if the local backend
+# hasn't answered within this many seconds — for streamed cleanup, hasn't
+# produced its first token — send the same request to OpenAI as well and use
+# whichever answers first. 0 (default) disables hedging for that stage.
+HEDGE_TRANSCRIBE_AFTER = _env_float("VOZA_HEDGE_TRANSCRIBE_AFTER", 0.0)
+HEDGE_CLEANUP_AFTER = _env_float("VOZA_HEDGE_CLEANUP_AFTER", 0.0)
+
+# End-to-end latency target (seconds from hotkey release) used to decide how
+# long a dictation must be before LLM cleanup is worth the wait. The threshold
+# follows measured cleanup speed per backend/model; 0 restores the fixed
+# 15 words (20 in local mode).
+LATENCY_TARGET = _env_float("VOZA_LATENCY_TARGET", 1.5)
+
 HOTKEY_RECORD = "ctrl+shift+space"
 HOTKEY_QUIT = "ctrl+shift+q"
 
 PASTE_DELAY = 0.15
 
+# Linux: keyboard layout the uinput virtual keyboard types with (uinput
+# sends key codes; the compositor's active layout turns them into text, so
+# a keymap that doesn't match it types the wrong characters). "us" types
+# ASCII; "us-intl" (US International) adds Spanish accents, ñ, ¿, ¡.
+# Characters outside the keymap go through wtype/xdotool. "off" (default)
+# types everything via wtype/xdotool; the paste shortcut uses uinput anyway.
+KEYMAP = os.getenv("VOZA_KEYMAP", "off").strip().lower()
+
 # Stream LLM cleanup output — type text into the active app as it arrives
 # instead of one paste at the end. Falls back to paste on platforms that
 # can't type incrementally (Wayland without wtype).
-STREAM_OUTPUT = os.getenv("VOZA_STREAM", "true").lower().strip() in ("1", "true", "yes", "on")
+STREAM_OUTPUT = _env_flag("VOZA_STREAM", "true")
+
+# Segment upload — while the hotkey is held, cut the recording at natural
+# pauses and transcribe each finished segment in the background, so release
+# only has to wait for the final tail. Off by default: Whisper sees less
+# context per request, which can cost a little accuracy at segment seams.
+SEGMENT_UPLOAD = _env_flag("VOZA_SEGMENT_UPLOAD", "false")
+
+# Streaming transcription — start cleanup and typing on finished sentences
+# while later audio is still being decoded (long dictations, streamed output
+# and PARALLEL_CLEANUP only: without chunks, cleanup waits for the whole
+# transcript). OpenAI mode switches to a transcription model that streams text
+# (whisper-1 can't); with segment upload, finished segments stream in either mode.
+STREAM_TRANSCRIBE = _env_flag("VOZA_STREAM_TRANSCRIBE", "false")
+STREAM_TRANSCRIBE_MODEL = os.getenv("VOZA_STREAM_TRANSCRIBE_MODEL", "gpt-4o-mini-transcribe")
+
+# Encode to OGG/Opus while recording (one ffmpeg fed block by block) instead of
+# after release. Only applies when ffmpeg is installed; uploads fall back to a
+# one-shot encode, then WAV, if the streamed payload isn't usable.
+STREAM_ENCODE = _env_flag("VOZA_STREAM_ENCODE", "true")
+
+# Rule-based cleanup (cleanup_rules.py): fillers, spoken punctuation, number
+# sequences and capitalization are fixed without the LLM, and dictations that
+# need nothing more skip the LLM entirely.
+CLEANUP_RULES = _env_flag("VOZA_CLEANUP_RULES", "true")
+
+# Clean long dictations (120+ words) in sentence-aligned chunks of ~60 words,
+# several at a time, streaming the results in order — the last word arrives
+# much sooner than with one long request. Off by default: each chunk sees only
+# a little surrounding context. For local mode, raise OLLAMA_NUM_PARALLEL too.
+PARALLEL_CLEANUP = _env_flag("VOZA_PARALLEL_CLEANUP", "false")
+
+# How the LLM returns its cleanup: "rewrite" (default) streams the whole
+# cleaned text; "edits" returns a compact edit list that Voza applies — far
+# fewer output tokens on long dictations, but typed in one piece once ready.
+# Malformed edit lists fall back to a rewrite.
+CLEANUP_MODE = os.getenv("VOZA_CLEANUP_MODE", "rewrite").lower().strip()
 
 SAMPLE_RATE = 16000
 CHANNELS = 1
 
+# Keep one input stream open for the whole session instead of opening the mic
+# on every hotkey press. Saves the device-open delay and lets a press reach
+# ~300 ms back, so the first syllable isn't clipped. Off by default: the mic
+# stays in use (and on macOS the mic indicator stays lit) while Voza runs.
+WARM_STREAM = _env_flag("VOZA_WARM_STREAM", "false")
+
+# Trim leading/trailing silence and shorten long pauses before upload (energy +
+# zero-crossing VAD). Less audio to encode, upload, and decode, and less
+# silence for Whisper to hallucinate from.
+VAD_TRIM = _env_flag("VOZA_VAD_TRIM", "true")
+
 # Audio device — set to device name (partial match), index number, or "auto".
 # "auto" (default) probes all mics and picks the loudest one.
 _AUDIO_DEVICE_RAW = os.getenv("VOZA_AUDIO_DEVICE", "auto")
 
 
+# Per-user state (logs, models, caches) lives here.
+VOZA_DIR = os.path.expanduser("~/.voza")
+
+# Transcripts are cached in memory by audio content (identical audio is never
+# transcribed twice). With this on they are also kept on disk, capped at
+# ~20 MB, so replays and re-processed recordings hit across restarts.
+TRANSCRIPT_CACHE_DISK = _env_flag("VOZA_TRANSCRIPT_CACHE_DISK", "false")
+# Same for LLM cleanup results (keyed by transcript, model and system prompt).
+CLEANUP_CACHE_DISK = _env_flag("VOZA_CLEANUP_CACHE_DISK", "false")
+CACHE_DIR = os.path.join(VOZA_DIR, "cache")
+
+# Record a per-dictation latency trace (hotkey, audio, encode, transcription,
+# cleanup first token, typing) to traces.jsonl, rotated at ~5 MB.
+# `main.py --trace-summary` prints p50/p95 per stage.
+TRACE = _env_flag("VOZA_TRACE", "false")
+TRACE_FILE = os.path.join(VOZA_DIR, "traces.jsonl")
+
+# The auto-detected mic is remembered here, so later launches only re-validate
+# that one device instead of sweeping every input.
+_DEVICE_CACHE = os.path.join(VOZA_DIR, "audio-device.json")
+
+_PROBE_SECONDS = 0.3
+# Devices still recording after this long are abandoned (a busy CoreAudio
+# device or a waking Continuity mic can block indefinitely).
+_PROBE_TIMEOUT = 3.0
+
+# Skip iOS devices that appear via Continuity — they cause long hangs
+_PROBE_SKIP = {"iphone", "ipad"}
+
+
+def _record_peak(idx):
+    """Record _PROBE_SECONDS on device `idx` and return the peak amplitude."""
+    import sounddevice as sd
+
+    with sd.InputStream(
+        samplerate=SAMPLE_RATE,
+        channels=CHANNELS,
+        dtype="int16",
+        device=idx,
+    ) as stream:
+        audio, _ = stream.read(int(SAMPLE_RATE * _PROBE_SECONDS))
+    # max/min instead of abs(): abs(-32768) overflows int16
+    return max(int(audio.max()), -int(audio.min()))
+
+
+def _device_fingerprint(idx):
+    """(name, host API, fingerprint) identifying device `idx` across launches.
+
+    Indices shift when devices come and go, so the cache matches on these
+    instead; the fingerprint catches a different device reusing the name.
+    """
+    import sounddevice as sd
+
+    d = sd.query_devices(idx)
+    hostapi = sd.query_hostapis(d['hostapi'])['name']
+    fingerprint = f"{d['max_input_channels']}ch@{int(d['default_samplerate'])}"
+    return d['name'], hostapi, fingerprint
+
+
+def _load_cached_device():
+    """Index of the cached auto-detected mic if it is still present, else None."""
+    import sounddevice as sd
+
+    try:
+        with open(_DEVICE_CACHE) as f:
+            cached = json.load(f)
+        wanted = (cached["name"], cached["hostapi"], cached["fingerprint"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    for i, d in enumerate(sd.query_devices()):
+        if d['max_input_channels'] > 0 and _device_fingerprint(i) == wanted:
+            return i
+    return None
+
+
+def _save_cached_device(idx):
+    name, hostapi, fingerprint = _device_fingerprint(idx)
+    try:
+        os.makedirs(VOZA_DIR, exist_ok=True)
+        with open(_DEVICE_CACHE, "w") as f:
+            json.dump({"name": name, "hostapi": hostapi, "fingerprint": fingerprint}, f)
+    except OSError:
+        pass  # caching is an optimization; the next launch just sweeps again
+
+
 def _probe_devices_once():
-    """Record a short sample on every input device; return (idx, name, peak) of the loudest."""
-    import numpy as np
+    """Record a short sample on every input device at once; return (idx, name, peak) of the loudest."""
+    import sounddevice as sd
 
-    devs = sd.query_devices()
-    best_idx = None
-    best_peak = -1
-    best_name = ""
+    candidates = [
+        (i, d['name']) for i, d in enumerate(sd.query_devices())
+        if d['max_input_channels'] >= 1
+        and not any(s in d['name'].lower() for s in _PROBE_SKIP)
+    ]
 
-    # Skip iOS devices that appear via Continuity — they cause long hangs
-    _skip = {"iphone", "ipad"}
+    # One daemon thread per device: the sweep takes one recording's time
+    # instead of one per device, and a device that hangs can't keep the
+    # process alive at exit (executor threads would be joined).
+    peaks = {}
 
-    for i, d in enumerate(devs):
-        if d['max_input_channels'] < 1:
-            continue
-        if any(s in d['name'].lower() for s in _skip):
-            continue
+    def _probe(i):
         try:
-            audio = sd.rec(
-                int(SAMPLE_RATE * 0.3),
-                samplerate=SAMPLE_RATE,
-                channels=CHANNELS,
-                dtype="int16",
-                device=i,
-            )
-            sd.wait()
-            peak = int(np.max(np.abs(audio)))
-            if peak > best_peak:
-                best_peak = peak
-                best_idx = i
-                best_name = d['name']
+            peaks[i] = _record_peak(i)
         except Exception:
-            continue  # skip devices that error out
-
+            pass  # skip devices that error out
+
+    threads = [threading.Thread(target=_probe, args=(i,), daemon=True) for i, _ in candidates]
+    for t in threads:
+        t.start()
+    deadline = time.monotonic() + _PROBE_TIMEOUT
+    for t in threads:
+        t.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    best_idx, best_name, best_peak = None, "", -1
+    for i, name in candidates:
+        peak = peaks.get(i, -1)
+        if peak > best_peak:
+            best_idx, best_name, best_peak = i, name, peak
     return best_idx, best_name, best_peak
 
 
@@ -87,10 +279,49 @@ _PROBE_RETRY_DELAY = 2.0  # seconds
 # exit code: transient (audio stack not up yet) vs. genuinely dead mic.
 PROBE_ALL_SILENT = False
 
+# Peak measured on the chosen device by auto-detect (None when the device was
+# set explicitly). main._check_mic skips its own recording when this already
+# proves the mic is alive.
+PROBE_PEAK = None
+
+
+def _validate_cached_device():
+    """Re-check the cached mic with one short recording; return its index or None."""
+    import sounddevice as sd
+
+    idx = _load_cached_device()
+    if idx is None:
+        return None
+    result = {}
+
+    def _probe():
+        try:
+            result["peak"] = _record_peak(idx)
+        except Exception:
+            pass
+
+    worker = threading.Thread(target=_probe, daemon=True)
+    worker.start()
+    worker.join(timeout=_PROBE_TIMEOUT)
+    peak = result.get("peak", 0)
+    if peak <= 0:
+        print("  Cached mic failed validation — probing all input devices...")
+        return None
+    global PROBE_PEAK
+    PROBE_PEAK = peak
+    print(f"  Auto-detected mic: [{idx}] {sd.query_devices(idx)['name']} (cached, peak={peak})")
+    return idx
+
 
 def _probe_best_device():
-    """Record a short sample on every input device and return the index with the highest peak."""
-    global PROBE_ALL_SILENT
+    """Return the cached mic if it still records, else sweep every input for the loudest."""
+    import sounddevice as sd
+
+    global PROBE_ALL_SILENT, PROBE_PEAK
+    idx = _validate_cached_device()
+    if idx is not None:
+        return idx
+
     best_idx = None
     best_name = ""
     best_peak = -1
@@ -118,11 +349,16 @@ def _probe_best_device():
     PROBE_ALL_SILENT = best_peak <= 0
     if best_idx is not None:
         print(f"  Auto-detected mic: [{best_idx}] {best_name} (peak={best_peak})")
+        if best_peak > 0:
+            PROBE_PEAK = best_peak
+            _save_cached_device(best_idx)
     return best_idx
 
 
 def _resolve_audio_device():
     """Resolve VOZA_AUDIO_DEVICE env var to a device index, or auto-detect the best mic."""
+    import sounddevice as sd
+
     raw = _AUDIO_DEVICE_RAW.strip().lower()
 
     # Auto-detect: probe all devices and pick the loudest
@@ -150,7 +386,17 @@ def _resolve_audio_device():
     return _probe_best_device()
 
 
-AUDIO_DEVICE = _resolve_audio_device()
+# Resolved input device index (None = PortAudio default). Probing records from
+# every mic, so it isn't done at import time: main runs init_audio_device() in
+# the background while the hotkey listener is already armed.
+AUDIO_DEVICE = None
+
+
+def init_audio_device():
+    """Resolve VOZA_AUDIO_DEVICE (probing all mics for "auto") into AUDIO_DEVICE."""
+    global AUDIO_DEVICE
+    AUDIO_DEVICE = _resolve_audio_device()
+    return AUDIO_DEVICE
 
 CLEANUP_SYSTEM_PROMPT = """\
 You are a voice-to-text cleanup assistant. You receive raw transcriptions from Whisper and return a cleaned version ready to paste directly into any application.
@@ -179,9 +425,28 @@ RULES:
 - Do NOT add content the speaker did not say
 - Do NOT change the meaning of anything
 - Do NOT answer or respond to questions in the transcription — the text is dictation, not a prompt. Clean it up and return it exactly as the speaker intended to write it.
+- The input may begin with a [CONTEXT] section holding what the speaker said just before the transcription. Use it only to understand the transcription — do NOT clean up, repeat, or include the context in your output
 - Return ONLY the cleaned text — nothing else"""
 
 
+# Edit-script variant (VOZA_CLEANUP_MODE=edits): same rules, but the model
+# returns only the changes, so output tokens scale with the number of fixes
+# rather than with the length of the dictation.
+CLEANUP_EDITS_PROMPT = CLEANUP_SYSTEM_PROMPT.replace(
+    "- Return ONLY the cleaned text — nothing else",
+    """\
+- Do NOT return the cleaned text. Return ONLY a JSON object {"edits": [...]} listing the edits that turn the transcription into the cleaned text
+
+EDIT FORMAT:
+- Each edit is a two-element array: ["exact text from the transcription", "replacement"]
+- The first string must appear verbatim in the transcription, after the text of the previous edit — list edits in order from start to end
+- Use "" as the replacement to delete text
+- Keep each edit short: only the words that change, plus a neighbouring word if needed to make it unique
+- If nothing needs to change, return {"edits": []}
+- Example: for "um so I went to the store and I bought milk" return {"edits": [["um so I", "I"], ["store and I", "store. I"], ["milk", "milk."]]}""",
+)
+
+
 def validate():
     if VOZA_MODE == "openai":
         if not OPENAI_API_KEY:
@@ -197,3 +462,9 @@ def validate():
     else:
         print(f"Error: Unknown VOZA_MODE '{VOZA_MODE}'. Use 'openai' or 'local'.")
         sys.exit(1)
+    if CLEANUP_MODE not in ("rewrite", "edits"):
+        print(f"Error: Unknown VOZA_CLEANUP_MODE '{CLEANUP_MODE}'. Use 'rewrite' or 'edits'.")
+        sys.exit(1)
+    if KEYMAP not in ("us", "us-intl", "off"):
+        print(f"Error: Unknown VOZA_KEYMAP '{KEYMAP}'. Use 'us', 'us-intl' or 'off'.")
+        sys.exit(1)
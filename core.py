@@ -0,0 +1,90 @@
+"""Asyncio core of the dictation pipeline.
+
+One event-loop thread runs every dictation as a task; the hotkey listeners
+hand recordings in with submit(), which is safe from any thread. The stages
+themselves call blocking code (the pooled HTTP clients, keystroke backends),
+so stage() runs each on a fixed executor per stage — the thread count is the
+same however many dictations are in flight — under its own timeout.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Workers per stage. Dictations overlap across stages (one transcribing while
+# the previous one is cleaned up); output is serialized anyway.
+_POOL_SIZES = {"transcribe": 2, "cleanup": 2, "output": 1}
+# After a timeout, how long the stage's worker gets to notice `cancel` and stop.
+_CANCEL_GRACE = 5.0
+# How often a stage with a `held` predicate checks it.
+_HELD_POLL = 0.25
+
+_pools = {
+    name: ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"voza-{name}")
+    for name, size in _POOL_SIZES.items()
+}
+_loop = asyncio.new_event_loop()
+
+
+class StageTimeout(Exception):
+    def __init__(self, stage: str, seconds: float):
+        super().__init__(f"{stage} timed out after {seconds:.0f}s")
+        self.stage = stage
+
+
+def start():
+    """Run the event loop on its own thread."""
+    threading.Thread(target=_loop.run_forever, daemon=True, name="voza-core").start()
+
+
+def submit(coro):
+    """Schedule `coro` on the core loop from any thread. Returns a concurrent Future."""
+    return asyncio.run_coroutine_threadsafe(coro, _loop)
+
+
+async def stage(name: str, fn, *args, timeout: float, cancel=None, held=None):
+    """Run blocking fn(*args) on the `name` stage's executor, within `timeout` seconds.
+
+    Time during which `held()` is true — fn is waiting on something outside
+    its own work, like an earlier dictation's output — doesn't count toward
+    the timeout. A running worker can't be interrupted, so on timeout (or if
+    the calling task is cancelled) `cancel` — a hedge.CancelToken that fn
+    checks between steps and hands its blocking reads to — is cancelled, and
+    the worker gets _CANCEL_GRACE seconds to wind down before StageTimeout is
+    raised (or the cancellation goes on).
+    """
+    # Like asyncio.to_thread: fn sees the task's context variables (the trace)
+    context = contextvars.copy_context()
+    future = asyncio.wrap_future(_pools[name].submit(context.run, fn, *args))
+    try:
+        await _wait(future, timeout, held)
+    except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+        future.add_done_callback(_discard)
+        if cancel is not None:
+            cancel.cancel()
+            await asyncio.wait([future], timeout=_CANCEL_GRACE)
+        if isinstance(exc, asyncio.TimeoutError):
+            raise StageTimeout(name, timeout) from None
+        raise
+    return future.result()
+
+
+async def _wait(future, timeout: float, held):
+    """Wait for `future` (without cancelling it); TimeoutError once `timeout` of un-held time passes."""
+    remaining = timeout
+    while True:
+        started = _loop.time()
+        done, _ = await asyncio.wait([future], timeout=remaining if held is None else min(remaining, _HELD_POLL))
+        if done:
+            return
+        if held is None or not held():
+            remaining -= _loop.time() - started
+        if remaining <= 0:
+            raise asyncio.TimeoutError
+
+
+def _discard(future):
+    """Retrieve an abandoned stage's outcome so asyncio doesn't warn about it."""
+    if not future.cancelled():
+        future.exception()
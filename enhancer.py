@@ -1,18 +1,59 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from api_client import client, fallback_client
-from config import VOZA_MODE, CLEANUP_MODEL, LOCAL_CLEANUP_MODEL, CLEANUP_SYSTEM_PROMPT
+import health
+import hedge
+import latency
+import tracing
+from api_client import client, fallback_client, http
+from cache import LRUCache
+from config import (
+    VOZA_MODE, CLEANUP_MODEL, LOCAL_CLEANUP_MODEL, CLEANUP_SYSTEM_PROMPT, HEDGE_CLEANUP_AFTER,
+    OLLAMA_BASE_URL, OLLAMA_KEEP_ALIVE, PREFIX_REUSE, PARALLEL_CLEANUP,
+    CLEANUP_CACHE_DISK, CACHE_DIR, CLEANUP_MODE, CLEANUP_EDITS_PROMPT,
+)
 
 _MODEL = LOCAL_CLEANUP_MODEL if VOZA_MODE == "local" else CLEANUP_MODEL
 
+# Prefix reuse: every request starts with the same system message, so the
+# backend can skip re-reading it. Locally, the primary client's calls go to
+# Ollama's native /api/chat, which keeps the model (and the KV cache holding
+# the evaluated prompt prefix) resident between dictations; warm_prefix()
+# evaluates the prefix ahead of the first dictation. In the cloud, requests
+# carry a fixed prompt_cache_key so they are routed to the same prompt cache.
+_NATIVE_OLLAMA = VOZA_MODE == "local" and PREFIX_REUSE
+_PROMPT_CACHE_KEY = "voza-cleanup-v1"
+_OLLAMA_TIMEOUT = (5, 60)  # (connect, read) seconds
 
-def _messages(raw_text: str):
+
+# Edit-script mode (VOZA_CLEANUP_MODE=edits): the model answers with a short
+# list of edits against the transcript instead of rewriting all of it, and
+# apply_edits() builds the cleaned text. Output that doesn't parse or apply
+# falls back to a normal rewrite.
+_EDITS = CLEANUP_MODE == "edits"
+
+
+def _messages(raw_text: str, context: str = "", edits: bool = False):
+    # The system message must stay byte-identical across requests (and stay
+    # first) for prefix caching to apply — keep anything per-dictation below it.
     return [
-        {"role": "system", "content": CLEANUP_SYSTEM_PROMPT},
-        {"role": "user", "content": f"[TRANSCRIPTION]\n{raw_text}\n[/TRANSCRIPTION]"},
+        {"role": "system", "content": CLEANUP_EDITS_PROMPT if edits else CLEANUP_SYSTEM_PROMPT},
+        {"role": "user", "content": _user_content(raw_text, context)},
     ]
 
 
+def _user_content(raw_text: str, context: str) -> str:
+    if not context:
+        return f"[TRANSCRIPTION]\n{raw_text}\n[/TRANSCRIPTION]"
+    return f"[CONTEXT]\n{context}\n[/CONTEXT]\n[TRANSCRIPTION]\n{raw_text}\n[/TRANSCRIPTION]"
+
+
 def _max_tokens(raw_text: str) -> int:
     # Cleanup output is the same length as the input or shorter. English/Spanish
     # runs ~4 chars/token, so chars/2 gives ~2x headroom — a fixed cap silently
@@ -20,33 +61,140 @@ def _max_tokens(raw_text: str) -> int:
     return max(256, len(raw_text) // 2)
 
 
-def enhance(raw_text: str) -> str:
+def enhance(raw_text: str, context: str = "") -> str:
     """Send raw transcript to LLM for cleanup.
 
     Retries once on failure; if the local server stays unreachable, falls
-    back to the OpenAI API when a key is configured.
+    back to the OpenAI API when a key is configured. With hedging on, a local
+    call still unanswered after VOZA_HEDGE_CLEANUP_AFTER races the fallback.
+    Results are cached, so a repeated dictation skips the LLM.
     Returns cleaned text, or raises on persistent failure.
     """
+    if not context and _use_chunks(raw_text):
+        # Each chunk is cached on its own (with its context)
+        return "".join(enhance_chunks(split_chunks(raw_text)))
+    key = _cache_key(raw_text, context)
+    cached = _cached(key)
+    if cached is not None:
+        return cached
+    route, start = current_route(), time.monotonic()
+    result = _enhance(raw_text, context)
+    tracing.mark("cleanup_done", last=True)
+    latency.record_cleanup(route, None, time.monotonic() - start, len(result.split()))
+    if result.strip():
+        _cache.put(key, result)
+    return result
+
+
+def _enhance(raw_text: str, context: str = "") -> str:
+    if _EDITS:
+        try:
+            return apply_edits(raw_text, _route_complete(raw_text, context, edits=True))
+        except ValueError as e:
+            print(f"  [Cleanup] Unusable edit script ({e}), rewriting instead")
+    return _route_complete(raw_text, context, edits=False)
+
+
+def _route_complete(raw_text: str, context: str, edits: bool) -> str:
+    if _circuit_open():
+        return _complete(fallback_client, CLEANUP_MODEL, raw_text, context=context, edits=edits)
+    if _hedging():
+        return hedge.race(
+            "Cleanup",
+            lambda token: _primary_complete(raw_text, token, context, edits),
+            lambda token: _complete(fallback_client, CLEANUP_MODEL, raw_text, token, context, edits),
+            HEDGE_CLEANUP_AFTER,
+        )
     try:
-        return _complete(client, _MODEL, raw_text)
+        return _primary_complete(raw_text, context=context, edits=edits)
     except Exception as e:
         if fallback_client is None:
             raise
         print(f"  Local cleanup unavailable, falling back to OpenAI: {e}")
-        return _complete(fallback_client, CLEANUP_MODEL, raw_text)
+        return _complete(fallback_client, CLEANUP_MODEL, raw_text, context=context, edits=edits)
+
+
+# Cleanup results by normalized transcript. The key includes the model and a
+# hash of the system prompt, so changing either starts from a clean cache.
+_cache = LRUCache(
+    "cleanup",
+    max_bytes=2 * 1024 * 1024,
+    disk_dir=os.path.join(CACHE_DIR, "cleanup") if CLEANUP_CACHE_DISK else None,
+    max_disk_bytes=20 * 1024 * 1024,
+)
+_PROMPT_HASH = hashlib.sha256(
+    (CLEANUP_EDITS_PROMPT if _EDITS else CLEANUP_SYSTEM_PROMPT).encode()
+).hexdigest()
+
+
+def _cache_key(raw_text: str, context: str) -> str:
+    # Whitespace and letter case vary between transcriptions of the same words
+    normalized = " ".join(raw_text.split()).casefold()
+    context = " ".join(context.split()).casefold()
+    return hashlib.sha256(f"{_MODEL}\0{_PROMPT_HASH}\0{context}\0{normalized}".encode()).hexdigest()
+
 
+def _cached(key: str):
+    result = _cache.get(key)
+    if result is not None:
+        print(f"  [Cache] Cleanup hit ({_cache.stats()})")
+        tracing.field("cleanup_backend", "cache", first=True)
+        tracing.mark("cleanup_first_token")
+        tracing.mark("cleanup_done", last=True)
+    return result
+
+
+def current_route() -> str:
+    """Backend and model the next cleanup request goes to first."""
+    if VOZA_MODE == "local" and (fallback_client is None or health.ollama.allow()):
+        return f"Ollama {LOCAL_CLEANUP_MODEL}"
+    return f"OpenAI {CLEANUP_MODEL}"
+
+
+def _hedging() -> bool:
+    return fallback_client is not None and HEDGE_CLEANUP_AFTER > 0
+
+
+def _circuit_open() -> bool:
+    """Whether Ollama's breaker is open and there is a fallback to use instead."""
+    if fallback_client is None or health.ollama.allow():
+        return False
+    print("  Ollama circuit open, using OpenAI")
+    return True
+
+
+def _record_failure(error, cancel):
+    # Only the local server has a breaker; a cancelled hedge loser isn't an outage
+    if VOZA_MODE == "local" and (cancel is None or not cancel.is_set()):
+        health.ollama.record_failure(error)
+
+
+def _record_success():
+    if VOZA_MODE == "local":
+        health.ollama.record_success()
+
+
+def _primary_complete(raw_text: str, cancel=None, context: str = "", edits: bool = False) -> str:
+    """_complete on the primary client, keeping the Ollama breaker up to date."""
+    try:
+        result = _complete(client, _MODEL, raw_text, cancel, context, edits)
+    except Exception as e:
+        _record_failure(e, cancel)
+        raise
+    _record_success()
+    return result
 
-def _complete(api, model, raw_text: str) -> str:
+
+def _complete(api, model, raw_text: str, cancel=None, context: str = "", edits: bool = False) -> str:
     last_error = None
     for attempt in range(2):
+        if attempt and cancel is not None and cancel.is_set():
+            break
         try:
-            response = api.chat.completions.create(
-                model=model,
-                max_completion_tokens=_max_tokens(raw_text),
-                temperature=0,
-                messages=_messages(raw_text),
-            )
-            result = response.choices[0].message.content
+            if _NATIVE_OLLAMA and api is client:
+                result = _ollama_complete(raw_text, context, edits)
+            else:
+                result = _openai_complete(api, model, raw_text, context, edits)
             if result and result.strip():
                 return result
             # Model returned empty content — fall back to raw text
@@ -60,7 +208,33 @@ def _complete(api, model, raw_text: str) -> str:
     raise last_error
 
 
-def enhance_stream(raw_text: str):
+def _openai_complete(api, model, raw_text: str, context: str = "", edits: bool = False) -> str:
+    start = time.monotonic()
+    extra = {"response_format": {"type": "json_object"}} if edits else {}
+    response = api.chat.completions.create(
+        model=model,
+        max_completion_tokens=_max_tokens(raw_text),
+        temperature=0,
+        messages=_messages(raw_text, context, edits),
+        **_cache_args(api),
+        **extra,
+    )
+    _report_openai(api, start, None, response.usage, edits)
+    return response.choices[0].message.content
+
+
+def _ollama_complete(raw_text: str, context: str = "", edits: bool = False) -> str:
+    start = time.monotonic()
+    body = _ollama_body(raw_text, False, context, edits)
+    if edits:
+        body["format"] = "json"
+    resp = http.post(f"{OLLAMA_BASE_URL}/api/chat", json=body, timeout=_OLLAMA_TIMEOUT)
+    data = _ollama_json(resp)
+    _report_ollama(start, None, data, edits)
+    return data["message"]["content"]
+
+
+def enhance_stream(raw_text: str, context: str = "", cancel=None):
     """Stream cleaned text from the LLM as it is generated.
 
     Yields text chunks as they arrive. Retries once (after a 1-second delay)
@@ -68,39 +242,242 @@ def enhance_stream(raw_text: str):
     is out, a mid-stream error propagates so the caller can handle the
     partial output. If the local server stays unreachable before any text is
     out, falls back to streaming from the OpenAI API when a key is configured.
+    With hedging on, a local stream with no first token after
+    VOZA_HEDGE_CLEANUP_AFTER races a fallback stream instead. A cached result
+    is yielded in one piece, immediately. Cancelling `cancel` (a
+    hedge.CancelToken) closes the streams in flight.
     """
+    if not context and _use_chunks(raw_text):
+        yield from enhance_chunks(split_chunks(raw_text), cancel)
+        return
+    yield from _cleaned_stream(raw_text, context, cancel)
+
+
+def _cleaned_stream(raw_text: str, context: str = "", cancel=None):
+    """enhance_stream() for one piece of text: never re-chunked (chunks come through here)."""
+    key = _cache_key(raw_text, context)
+    cached = _cached(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    route, start, first = current_route(), time.monotonic(), None
+    for delta in _enhance_stream(raw_text, context, cancel):
+        if first is None:
+            first = time.monotonic() - start
+            tracing.mark("cleanup_first_token")
+        parts.append(delta)
+        yield delta
+    tracing.mark("cleanup_done", last=True)
+    result = "".join(parts)
+    if first is not None:
+        latency.record_cleanup(route, first, time.monotonic() - start, len(result.split()))
+    if result.strip():  # only complete streams get here
+        _cache.put(key, result)
+
+
+def _enhance_stream(raw_text: str, context: str = "", cancel=None):
+    if _EDITS:
+        # An edit script is only usable once complete: apply it, then type the
+        # result in one piece. A bad script falls through to a streamed rewrite.
+        try:
+            yield apply_edits(raw_text, _route_complete(raw_text, context, edits=True))
+            return
+        except ValueError as e:
+            print(f"  [Cleanup] Unusable edit script ({e}), rewriting instead")
+    if _circuit_open():
+        yield from _stream(fallback_client, CLEANUP_MODEL, raw_text, cancel, context)
+        return
+    if _hedging():
+        yield from hedge.race_stream(
+            "Cleanup",
+            lambda token: _primary_stream(raw_text, token, context),
+            lambda token: _stream(fallback_client, CLEANUP_MODEL, raw_text, token, context),
+            HEDGE_CLEANUP_AFTER,
+            cancel,
+        )
+        return
     started = False
     try:
-        for delta in _stream(client, _MODEL, raw_text):
+        for delta in _primary_stream(raw_text, cancel, context):
             started = True
             yield delta
         return
     except Exception as e:
-        if started or fallback_client is None:
+        if started or fallback_client is None or (cancel is not None and cancel.is_set()):
             raise
         print(f"  Local cleanup unavailable, falling back to OpenAI: {e}")
-    yield from _stream(fallback_client, CLEANUP_MODEL, raw_text)
+    yield from _stream(fallback_client, CLEANUP_MODEL, raw_text, cancel, context)
+
+
+# Chunked cleanup (VOZA_PARALLEL_CLEANUP): a long transcript is split at
+# sentence boundaries and the chunks are cleaned concurrently, each with the
+# end of the chunk before it as read-only [CONTEXT]. More workers than Ollama's
+# default parallelism (OLLAMA_NUM_PARALLEL) would only queue on the server.
+_CHUNK_WORDS = 60
+_CONTEXT_WORDS = 30
+_PARALLEL_MIN_WORDS = 2 * _CHUNK_WORDS
+_CHUNK_WORKERS = 3
+_chunk_pool = ThreadPoolExecutor(max_workers=_CHUNK_WORKERS, thread_name_prefix="voza-chunk")
+# Each enhance_chunks() call reads its (possibly lazy) chunks on one of these;
+# the cleanup stage runs at most two dictations at a time.
+_feed_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="voza-chunk-feed")
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _use_chunks(raw_text: str) -> bool:
+    return PARALLEL_CLEANUP and len(raw_text.split()) >= _PARALLEL_MIN_WORDS
+
+
+def split_chunks(raw_text: str) -> list:
+    """Group the sentences of `raw_text` into chunks of about _CHUNK_WORDS words."""
+    chunks = list(chunk_sentences(_SENTENCE_END.split(raw_text.strip())))
+    # A short remainder joins the last chunk instead of going out alone
+    if len(chunks) > 1 and len(chunks[-1].split()) < _CHUNK_WORDS // 2:
+        last = chunks.pop()
+        chunks[-1] += " " + last
+    return chunks
+
+
+def chunk_sentences(sentences):
+    """Lazily group finished sentences into chunks of at least _CHUNK_WORDS words.
+
+    A run-on "sentence" past twice that (no . ! ? to split at) is cut by word
+    count, so no chunk is ever far over the size.
+    """
+    current, words = [], 0
+    for sentence in _bounded(sentences):
+        current.append(sentence)
+        words += len(sentence.split())
+        if words >= _CHUNK_WORDS:
+            yield " ".join(current)
+            current, words = [], 0
+    if current:
+        yield " ".join(current)
+
+
+def _bounded(sentences):
+    for sentence in sentences:
+        words = sentence.split()
+        if len(words) <= 2 * _CHUNK_WORDS:
+            yield sentence
+            continue
+        for i in range(0, len(words), _CHUNK_WORDS):
+            yield " ".join(words[i:i + _CHUNK_WORDS])
+
 
+def enhance_chunks(chunks, cancel=None):
+    """Clean transcript chunks concurrently and stream the result in order.
 
-def _stream(api, model, raw_text: str):
+    `chunks` may be a lazy iterator: each chunk is submitted to the chunk
+    pool as soon as it is produced. The first chunk streams live; a later
+    chunk's output is buffered until every chunk before it is out, then
+    released at once and streamed live from there. A chunk that fails before
+    producing any text is typed raw rather than losing the rest; an error
+    raised by `chunks` itself is re-raised after the chunks before it.
+    Cancelling `cancel` stops the feed and closes the streams in flight.
+    """
+    order = queue.Queue()  # (raw chunk, its output queue) in chunk order, then None
+    stop = threading.Event()
+    if cancel is not None:
+        cancel.on_cancel(stop.set)
+    _feed_pool.submit(tracing.wrap(_submit_chunks), chunks, order, stop, cancel)
+
+    count = 0
+    try:
+        while True:
+            item = order.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            text, out = item
+            sep = " " if count else ""
+            count += 1
+            started = False
+            while True:
+                kind, payload = out.get()
+                if kind == "chunk":
+                    if not started and not payload[:1].isspace():
+                        payload = sep + payload
+                    started = True
+                    yield payload
+                elif kind == "end":
+                    if not started:
+                        yield sep + text  # model returned nothing — keep the raw text
+                    break
+                else:
+                    if started:
+                        raise payload
+                    print(f"  [Cleanup] Chunk {count} failed ({payload}), using its raw text")
+                    yield sep + text
+                    break
+        print(f"  [Cleanup] {count} chunks cleaned ({_CHUNK_WORKERS} in parallel)")
+    finally:
+        stop.set()
+
+
+def _submit_chunks(chunks, order, stop, cancel):
+    previous = ""
+    try:
+        for text in chunks:
+            if stop.is_set():
+                return
+            out = queue.Queue()
+            context = " ".join(previous.split()[-_CONTEXT_WORDS:])
+            _chunk_pool.submit(tracing.wrap(_clean_chunk), text, context, out, stop, cancel)
+            order.put((text, out))
+            previous = text
+    except Exception as e:
+        order.put(e)  # e.g. the transcription feeding `chunks` failed
+    finally:
+        order.put(None)
+
+
+def _clean_chunk(text, context, out, stop, cancel):
+    if stop.is_set():
+        return
+    try:
+        for delta in _cleaned_stream(text, context, cancel):
+            if stop.is_set():
+                return
+            out.put(("chunk", delta))
+        out.put(("end", None))
+    except Exception as e:
+        out.put(("error", e))
+
+
+def _primary_stream(raw_text: str, cancel=None, context: str = ""):
+    """_stream on the primary client, keeping the Ollama breaker up to date."""
+    started = False
+    try:
+        for delta in _stream(client, _MODEL, raw_text, cancel, context):
+            if not started:
+                started = True
+                _record_success()
+            yield delta
+    except Exception as e:
+        if not started:
+            _record_failure(e, cancel)
+        raise
+    if not started:
+        _record_success()  # answered, just with nothing to say
+
+
+def _stream(api, model, raw_text: str, cancel=None, context: str = ""):
     last_error = None
     for attempt in range(2):
+        if attempt and cancel is not None and cancel.is_set():
+            break
         started = False
         try:
-            stream = api.chat.completions.create(
-                model=model,
-                max_completion_tokens=_max_tokens(raw_text),
-                temperature=0,
-                stream=True,
-                messages=_messages(raw_text),
-            )
-            for chunk in stream:
-                if not chunk.choices:
-                    continue
-                delta = chunk.choices[0].delta.content
-                if delta:
-                    started = True
-                    yield delta
+            if _NATIVE_OLLAMA and api is client:
+                deltas = _ollama_deltas(raw_text, cancel, context)
+            else:
+                deltas = _openai_deltas(api, model, raw_text, cancel, context)
+            for delta in deltas:
+                started = True
+                yield delta
             return
         except Exception as e:
             if started:
@@ -111,3 +488,195 @@ def _stream(api, model, raw_text: str):
                 time.sleep(1)
 
     raise last_error
+
+
+def _openai_deltas(api, model, raw_text: str, cancel=None, context: str = ""):
+    """One streamed chat completion through the OpenAI SDK (no retry)."""
+    start = time.monotonic()
+    first = None
+    usage = None
+    stream = api.chat.completions.create(
+        model=model,
+        max_completion_tokens=_max_tokens(raw_text),
+        temperature=0,
+        stream=True,
+        stream_options={"include_usage": True},
+        messages=_messages(raw_text, context),
+        **_cache_args(api),
+    )
+    if cancel is not None:
+        cancel.on_cancel(stream.close)  # abort a read blocked on a losing stream
+    try:
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage  # last chunk, with include_usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first is None:
+                    first = time.monotonic()
+                yield delta
+    finally:
+        stream.close()
+    _report_openai(api, start, first, usage)
+
+
+def _ollama_deltas(raw_text: str, cancel=None, context: str = ""):
+    """One streamed chat through Ollama's native API (no retry)."""
+    start = time.monotonic()
+    first = None
+    resp = http.post(
+        f"{OLLAMA_BASE_URL}/api/chat",
+        json=_ollama_body(raw_text, True, context),
+        stream=True,
+        timeout=_OLLAMA_TIMEOUT,
+    )
+    if cancel is not None:
+        cancel.on_cancel(resp.close)
+    try:
+        if resp.status_code >= 400:
+            _ollama_json(resp)  # raises with Ollama's error message
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if "error" in data:
+                raise RuntimeError(f"Ollama: {data['error']}")
+            delta = data.get("message", {}).get("content")
+            if delta:
+                if first is None:
+                    first = time.monotonic()
+                yield delta
+            if data.get("done"):
+                _report_ollama(start, first, data)
+                return
+    finally:
+        resp.close()
+
+
+def _ollama_body(raw_text: str, stream: bool, context: str = "", edits: bool = False) -> dict:
+    return {
+        "model": LOCAL_CLEANUP_MODEL,
+        "messages": _messages(raw_text, context, edits),
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {"temperature": 0, "num_predict": _max_tokens(raw_text)},
+    }
+
+
+def _ollama_json(resp) -> dict:
+    try:
+        data = resp.json()
+    except ValueError:
+        resp.raise_for_status()
+        raise
+    if "error" in data:
+        raise RuntimeError(f"Ollama: {data['error']}")
+    resp.raise_for_status()
+    return data
+
+
+def warm_prefix():
+    """Evaluate the system prompt on Ollama so the first dictation reuses it.
+
+    Sends the same message layout as a real request with an empty transcript
+    and a one-token answer; the evaluated prefix stays in Ollama's KV cache.
+    """
+    body = _ollama_body("", False, edits=_EDITS)
+    body["options"]["num_predict"] = 1
+    _ollama_json(http.post(f"{OLLAMA_BASE_URL}/api/chat", json=body, timeout=60))
+
+
+def _cache_args(api) -> dict:
+    # Ollama's OpenAI-compatible API has no prompt cache to route to
+    if VOZA_MODE == "local" and api is client:
+        return {}
+    return {"prompt_cache_key": _PROMPT_CACHE_KEY}
+
+
+def _report_openai(api, start, first, usage, edits=False):
+    backend = "Ollama" if (VOZA_MODE == "local" and api is client) else "OpenAI"
+    tokens = ""
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = getattr(details, "cached_tokens", None) if details is not None else None
+        tokens = f", {usage.prompt_tokens} prompt tokens"
+        if cached is not None:
+            tokens += f" ({cached} cached)"
+        tokens += f", {usage.completion_tokens} output tokens"
+    _report(backend, start, first, tokens, edits)
+
+
+def _report_ollama(start, first, data, edits=False):
+    # prompt_eval_count only counts tokens Ollama had to evaluate — the part
+    # of the prompt that wasn't already in its cache.
+    tokens = ""
+    if data.get("prompt_eval_count") is not None:
+        tokens += f", {data['prompt_eval_count']} prompt tokens evaluated"
+    if data.get("eval_count") is not None:
+        tokens += f", {data['eval_count']} output tokens"
+    _report("Ollama", start, first, tokens, edits)
+
+
+def _report(backend, start, first, tokens, edits=False):
+    total = time.monotonic() - start
+    ttft = f"first token {first - start:.2f}s, " if first is not None else ""
+    mode = " (edits)" if edits else ""
+    print(f"  [Cleanup] {backend}{mode}: {ttft}{total:.2f}s total{tokens}")
+    tracing.field("cleanup_backend", backend + mode, first=True)
+
+
+def apply_edits(raw_text: str, script: str) -> str:
+    """Apply an edit script ({"edits": [[old, new], ...]}) to `raw_text`.
+
+    Each `old` must occur verbatim in the transcript after the previous edit;
+    it is replaced by `new` ("" deletes it). Raises ValueError on anything
+    malformed, or when the result lost so much text it is probably wrong.
+    """
+    try:
+        edits = json.loads(_strip_fence(script))["edits"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"not an edit list: {e}") from None
+    if not isinstance(edits, list):
+        raise ValueError("edits is not a list")
+    result = ""
+    cursor = 0
+    for edit in edits:
+        if not (isinstance(edit, list) and len(edit) == 2 and all(isinstance(x, str) for x in edit)):
+            raise ValueError(f"bad edit {edit!r}")
+        old, new = edit
+        if not old:
+            raise ValueError("empty edit target")
+        at = raw_text.find(old, cursor)
+        if at < 0:
+            raise ValueError(f"edit target not found in order: {old!r}")
+        result = _splice(_splice(result, raw_text[cursor:at]), new)
+        cursor = at + len(old)
+    result = _splice(result, raw_text[cursor:]).strip()
+    if len(result) < len(raw_text) * _EDIT_MIN_KEPT:
+        raise ValueError("edits removed most of the transcript")
+    return result
+
+
+# Cleanup never shortens a transcript this much; a script that does is wrong.
+_EDIT_MIN_KEPT = 0.4
+
+
+def _splice(left: str, right: str) -> str:
+    """left + right, tidying the seam only: deletions can leave a doubled space
+    or a space before punctuation there. Text the edits didn't touch keeps its spacing."""
+    if not left or not right:
+        return left + right
+    if left[-1] in " \t":
+        right = right.lstrip(" \t")
+    if right[:1] in (",", ".", ";", ":", "!", "?"):
+        left = left.rstrip(" \t")
+    return left + right
+
+
+def _strip_fence(script: str) -> str:
+    script = script.strip()
+    if script.startswith("```"):
+        script = script.strip("`").removeprefix("json").strip()
+    return script
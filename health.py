@@ -0,0 +1,115 @@
+"""Circuit breakers for the local servers (whisper-server and Ollama).
+
+Each breaker is closed while its server works. A failed request (which has
+already been retried once) opens it: requests then go straight to the cloud
+fallback instead of rediscovering the outage, and a background prober polls
+the server. Once the server answers, the breaker goes half-open and the next
+real request is the trial — success closes it, failure opens it again.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from api_client import http
+from config import WHISPER_SERVER_URL, OLLAMA_BASE_URL
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# Consecutive failed requests before opening. Each request already retried
+# once, so one failure is a real outage.
+_FAILURE_THRESHOLD = 1
+_PROBE_INTERVAL = 5.0  # seconds between health probes while open
+_PROBE_TIMEOUT = 2.0
+
+
+class Breaker:
+    """closed/open/half-open health state for one local backend."""
+
+    def __init__(self, name: str, probe_url: str):
+        self.name = name
+        self._probe_url = probe_url
+        self._state = CLOSED
+        self._failures = 0
+        self._prober = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a request should try this backend (False while open)."""
+        return self._state != OPEN
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            if self._state != CLOSED:
+                self._set(CLOSED, "request succeeded")
+
+    def record_failure(self, error):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._failures >= _FAILURE_THRESHOLD
+            ):
+                self._set(OPEN, str(error))
+                self._start_prober()
+
+    def check(self) -> bool:
+        """Probe the server once; open or half-open the breaker to match. Returns reachability."""
+        alive = self._probe()
+        with self._lock:
+            if alive and self._state == OPEN:
+                self._set(HALF_OPEN, "server answering again")
+            elif not alive and self._state == CLOSED:
+                self._set(OPEN, "health probe failed")
+                self._start_prober()
+        return alive
+
+    def _probe(self) -> bool:
+        try:
+            # Any non-5xx answer means the server is up (older whisper-server
+            # builds have no /health and answer 404).
+            return http.get(self._probe_url, timeout=_PROBE_TIMEOUT).status_code < 500
+        except Exception:
+            return False
+
+    def _set(self, state: str, why: str):
+        print(f"  [Health] {self.name}: {self._state} → {state} ({why})")
+        self._state = state
+
+    def _start_prober(self):
+        """Poll the server in the background while the breaker is open (call under _lock)."""
+        if self._prober is not None and self._prober.is_alive():
+            return
+        self._prober = threading.Thread(target=self._probe_loop, daemon=True)
+        self._prober.start()
+
+    def _probe_loop(self):
+        while self._state == OPEN:
+            time.sleep(_PROBE_INTERVAL)
+            if self._probe():
+                with self._lock:
+                    if self._state == OPEN:
+                        self._set(HALF_OPEN, "server answering again")
+
+
+# One worker per server, for concurrent checks and warm-ups (see warmup.py)
+pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="voza-health")
+
+whisper = Breaker("whisper-server", f"{WHISPER_SERVER_URL}/health")
+ollama = Breaker("Ollama", f"{OLLAMA_BASE_URL}/api/version")
+
+
+def check_all():
+    """Probe both servers concurrently (at startup, so the banner shows real state)."""
+    wait([pool.submit(b.check) for b in (whisper, ollama)], timeout=_PROBE_TIMEOUT + 1)
+
+
+def status() -> str:
+    """One-line breaker summary for the banner."""
+    return ", ".join(f"{b.name} {b.state}" for b in (whisper, ollama))
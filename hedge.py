@@ -0,0 +1,195 @@
+"""Hedged requests: race a slow local backend against the cloud fallback.
+
+If the local call hasn't answered within a latency budget (for streams: hasn't
+produced its first chunk), the same request is also sent to the fallback;
+whichever responds first wins and the other is cancelled.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+import tracing
+
+# Two hedged calls in flight per request; streams hold a worker each for their
+# whole length, and chunked cleanup runs up to three requests at once.
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="voza-hedge")
+# While a stream is out, how often race_stream() checks the caller's token.
+_CANCEL_POLL = 0.5
+
+
+class CancelToken:
+    """Handed to each hedged call so the loser can be stopped.
+
+    Calls check is_set() before retrying, and register closers (e.g. an HTTP
+    stream's close()) that cancel() runs to abort a request blocked mid-read.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._closers = []
+        self._lock = threading.Lock()
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def on_cancel(self, close):
+        with self._lock:
+            if not self._event.is_set():
+                self._closers.append(close)
+                return
+        _quietly(close)
+
+    def cancel(self):
+        with self._lock:
+            self._event.set()
+            closers, self._closers = self._closers, []
+        for close in closers:
+            _quietly(close)
+
+
+def _quietly(fn):
+    try:
+        fn()
+    except Exception:
+        pass
+
+
+def race(stage: str, local, cloud, budget: float):
+    """Call local(token); after `budget` seconds without an answer, race cloud(token).
+
+    If local fails before the budget is up, falls straight back to cloud (the
+    same as an unhedged fallback). Returns the first successful result; raises
+    the last error if both fail.
+    """
+    start = time.monotonic()
+    tokens = {"local": CancelToken(), "cloud": CancelToken()}
+    futures = {_pool.submit(tracing.wrap(local), tokens["local"]): "local"}
+    try:
+        result = next(iter(futures)).result(timeout=budget)
+        _log_winner(stage, "local", start)
+        return result
+    except FutureTimeout:
+        print(f"  [Hedge] {stage}: local hasn't answered in {budget:.1f}s — also asking OpenAI")
+    except Exception as e:
+        print(f"  [Hedge] {stage}: local failed ({e}), falling back to OpenAI")
+        futures = {}
+
+    futures[_pool.submit(tracing.wrap(cloud), tokens["cloud"])] = "cloud"
+    last_error = None
+    while futures:
+        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                last_error = e
+                continue
+            for loser in futures.values():
+                tokens[loser].cancel()
+            _log_winner(stage, name, start)
+            return result
+    raise last_error
+
+
+def race_stream(stage: str, local, cloud, budget: float, cancel=None):
+    """Stream from local(token); if no chunk arrives within `budget`, race cloud(token).
+
+    Yields the chunks of whichever stream produces a chunk first and cancels
+    the other. Before any chunk is out, a failed stream just leaves the race
+    to the other one; after that, errors propagate like an unhedged stream.
+    Cancelling `cancel` (the caller's own token) cancels both.
+    """
+    start = time.monotonic()
+    events = queue.Queue()
+    tokens = {"local": CancelToken(), "cloud": CancelToken()}
+    if cancel is not None:
+        for token in tokens.values():
+            cancel.on_cancel(token.cancel)
+    pump = tracing.wrap(_pump)  # the racers report into this dictation's trace
+    _pool.submit(pump, "local", local, tokens["local"], events)
+    running = {"local"}
+    hedged = False
+    winner = None
+    last_error = None
+    deadline = start + budget
+
+    try:
+        while True:
+            waiting = winner is None and not hedged
+            timeout = max(0.0, deadline - time.monotonic()) if waiting else _CANCEL_POLL
+            try:
+                name, kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                if not waiting:
+                    if cancel is not None and cancel.is_set():
+                        raise RuntimeError(f"{stage} cancelled")
+                    continue
+                name, kind, payload = None, "timeout", None
+
+            if kind == "timeout" or (kind == "error" and not hedged and winner is None):
+                if cancel is not None and cancel.is_set():
+                    raise payload if kind == "error" else RuntimeError(f"{stage} cancelled")
+                hedged = True
+                if kind == "timeout":
+                    print(f"  [Hedge] {stage}: no local output in {budget:.1f}s — also asking OpenAI")
+                else:
+                    running.discard(name)
+                    last_error = payload
+                    print(f"  [Hedge] {stage}: local failed ({payload}), falling back to OpenAI")
+                _pool.submit(pump, "cloud", cloud, tokens["cloud"], events)
+                running.add("cloud")
+                continue
+            if winner is not None and name != winner:
+                continue  # the cancelled loser's last words
+
+            if kind == "chunk":
+                if winner is None:
+                    winner = name
+                    for loser in running - {name}:
+                        tokens[loser].cancel()
+                    _log_winner(stage, name, start)
+                yield payload
+            elif kind == "end":
+                if winner is None and len(running) > 1:
+                    running.discard(name)  # finished empty; let the other one answer
+                    continue
+                return
+            else:  # error
+                running.discard(name)
+                if winner is not None:
+                    raise payload
+                last_error = payload
+                if not running:
+                    raise last_error
+    finally:
+        for token in tokens.values():
+            token.cancel()
+
+
+def _pump(name, make_stream, token, events):
+    """Forward one stream's chunks into the shared event queue.
+
+    Always ends with an "end" or "error" event. A stream cut short by its
+    token ends in an error, so its partial output never passes for a whole
+    answer.
+    """
+    kind, payload = "end", None
+    try:
+        for chunk in make_stream(token):
+            if token.is_set():
+                break
+            events.put((name, "chunk", chunk))
+    except Exception as e:
+        kind, payload = "error", e
+    finally:
+        if kind == "end" and token.is_set():
+            kind, payload = "error", RuntimeError(f"{name} stream cancelled")
+        events.put((name, kind, payload))
+
+
+def _log_winner(stage: str, name: str, start: float):
+    backend = "local" if name == "local" else "OpenAI"
+    print(f"  [Hedge] {stage}: {backend} won ({time.monotonic() - start:.2f}s)")
@@ -1,10 +1,14 @@
 import os
+import queue
 import shutil
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from config import PASTE_DELAY
+import tracing
+from config import PASTE_DELAY, KEYMAP
 
 _IS_MACOS = sys.platform == "darwin"
 
@@ -18,16 +22,19 @@ if not _IS_MACOS:
 
 def inject(text: str):
     """Copy text to clipboard and simulate paste keystroke."""
+    tracing.mark("first_keystroke")
     if _IS_MACOS:
         _inject_macos(text)
     else:
         _inject_linux(text)
+    tracing.mark("last_keystroke", last=True)
 
 
 def can_stream() -> bool:
     """Whether this platform can type text incrementally (streaming output).
 
-    Wayland needs wtype — uinput alone can't produce arbitrary Unicode.
+    Linux needs wtype (Wayland) or xdotool (X11) for whatever the uinput
+    keymap can't type, so those remain required.
     """
     if _IS_MACOS:
         return True
@@ -36,53 +43,203 @@ def can_stream() -> bool:
     return _HAS_XDOTOOL
 
 
-# Buffer streamed deltas until this many chars before typing a batch, so we
-# don't spawn one typing subprocess per token.
-_STREAM_FLUSH_AT = 24
+def prepare():
+    """Create the uinput keyboard now (Linux), so the first paste doesn't wait for it."""
+    if _IS_MACOS:
+        return
+    if _IS_WAYLAND:
+        _paste_keyboard()
+    else:
+        _keyboard()
+
+
+def _keyboard():
+    """The persistent uinput keyboard, or None (keymap off or no uinput access)."""
+    if KEYMAP == "off":
+        return None
+    try:
+        import virtual_keyboard
+    except ImportError:
+        return None  # no evdev
+    return virtual_keyboard.get(KEYMAP)
+
+
+def _paste_keyboard():
+    """The uinput keyboard for the paste shortcut, which needs no keymap (so even with it off)."""
+    kbd = _keyboard()
+    if kbd is None:
+        try:
+            import virtual_keyboard
+        except ImportError:
+            return None
+        kbd = virtual_keyboard.get("us")
+    return kbd
+
+
+# Partial words are held for a word boundary at most this long, so a slow
+# stream still shows text promptly.
+_FLUSH_AFTER = 0.2
+# Deltas waiting to be typed before feed() blocks (a stalled typing backend
+# eventually pushes back on the stream).
+_QUEUE_SIZE = 1024
+_CLOSE = object()
+# Every StreamTyper types on this one thread, so streams never interleave.
+_typing_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voza-typer")
 
 
 class StreamTyper:
     """Types streamed text chunks into the focused app as they arrive.
 
-    feed() buffers deltas and flushes on word boundaries; close() flushes
-    whatever remains. `text` holds everything typed so far, so callers can
-    recover from a stream that dies partway through.
+    Typing runs on a shared typing thread, so the caller keeps reading the
+    stream while a keystroke backend works. Each time the typing thread is free it
+    takes everything queued since its last batch and types it up to the last
+    word boundary — the first word goes out as soon as it's complete, and
+    batches grow on their own when the backend is slower than the stream. A
+    partial word is typed anyway once it has waited _FLUSH_AFTER seconds.
+
+    feed() queues a delta; close() types whatever remains and waits for it.
+    Both raise a typing error from the thread. `text` holds everything typed
+    so far, so callers can recover from a stream that dies partway through.
+    `gate`, if given, is called on the typing thread before each batch and
+    may block to hold typing back. With `after` (a Future), typing starts
+    once it is done; deltas queue up until then. Once `cancel` (a
+    hedge.CancelToken) is cancelled, nothing more is typed: feed() and close()
+    return at once, and the typing job drops what's queued and ends, so it
+    doesn't hold the shared typing thread.
     """
 
-    def __init__(self):
+    def __init__(self, gate=None, after=None, cancel=None):
         self.text = ""
-        self._buffer = ""
-        self._first = True
+        self._gate = gate
+        self._after = after
+        self._queue = queue.Queue(maxsize=_QUEUE_SIZE)
+        self._finished = None  # set when the typing job ends (or is cancelled), once started
+        self._error = None  # raised once, by the next feed()/close()
+        self._failed = False
+        self._closed = False
+        self._cancelled = False
+        if cancel is not None:
+            cancel.on_cancel(self._cancel)
 
     def feed(self, chunk: str):
-        self._buffer += chunk
-        if len(self._buffer) < _STREAM_FLUSH_AT:
+        self._raise_error()
+        if self._cancelled:
             return
-        cut = max(self._buffer.rfind(" "), self._buffer.rfind("\n"))
-        if cut == -1:
-            cut = len(self._buffer) - 1
-        self._type(self._buffer[:cut + 1])
-        self._buffer = self._buffer[cut + 1:]
+        if self._finished is None:
+            self._finished = threading.Event()
+            run = tracing.wrap(self._run)
+            if self._after is None:
+                _typing_pool.submit(run)
+            else:
+                self._after.add_done_callback(lambda _: _typing_pool.submit(run))
+        self._queue.put(chunk)
 
     def close(self):
-        # Clear the buffer before typing: if _type fails partway, a second
-        # close() (e.g. from an error handler) must not retype the same text.
-        pending, self._buffer = self._buffer, ""
-        if pending:
-            self._type(pending)
-
-    def _type(self, text: str):
-        if self._first:
-            time.sleep(PASTE_DELAY)  # let hotkey modifiers settle
-            self._first = False
-        _type_text(text)
-        self.text += text
+        # A second close() (e.g. from an error handler) must not wait again
+        # or re-raise the same error.
+        if self._closed:
+            return
+        self._closed = True
+        if self._finished is not None and not self._cancelled:
+            self._queue.put(_CLOSE)
+            self._finished.wait()
+        self._raise_error()
+
+    def _cancel(self):
+        self._cancelled = True
+        # Unblock a feed()/close() waiting for queue space, and a typing job
+        # waiting for the next delta
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        if self._finished is not None:
+            self._queue.put_nowait(_CLOSE)
+            self._finished.set()
+
+    def _raise_error(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _run(self):
+        try:
+            self._type_batches()
+        finally:
+            self._finished.set()
+
+    def _type_batches(self):
+        pending = ""
+        deadline = None
+        first = True
+        while True:
+            try:
+                item = self._queue.get(timeout=None if deadline is None
+                                       else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None  # a partial word waited long enough
+            closing = item is _CLOSE
+            if isinstance(item, str):
+                pending += item
+            # Coalesce everything that arrived while we were typing
+            while not closing:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _CLOSE:
+                    closing = True
+                else:
+                    pending += item
+
+            if closing or item is None:
+                batch, pending = pending, ""
+            else:
+                cut = max(pending.rfind(" "), pending.rfind("\n"))
+                batch, pending = pending[:cut + 1], pending[cut + 1:]
+            if self._cancelled:
+                return
+            if batch and not self._failed:
+                if self._gate is not None:
+                    self._gate()
+                if first:
+                    time.sleep(PASTE_DELAY)  # let hotkey modifiers settle
+                    first = False
+                try:
+                    tracing.mark("first_keystroke")
+                    _type_text(batch)
+                    tracing.mark("last_keystroke", last=True)
+                    self.text += batch
+                except Exception as exc:
+                    self._error = exc  # drop the rest; feed()/close() report it
+                    self._failed = True
+            if closing:
+                return
+            if not pending:
+                deadline = None
+            elif deadline is None or batch:
+                deadline = time.monotonic() + _FLUSH_AFTER
 
 
 def _type_text(text: str):
     if _IS_MACOS:
         _type_macos(text)
-    elif _IS_WAYLAND:
+        return
+    kbd = _keyboard()
+    if kbd is None:
+        _type_subprocess(text)
+        return
+    # Type what the keymap covers directly; hand the rest to wtype/xdotool
+    for run, typable in kbd.runs(text):
+        if typable:
+            kbd.type(run)
+        else:
+            _type_subprocess(run)
+
+
+def _type_subprocess(text: str):
+    if _IS_WAYLAND:
         subprocess.run(
             ["wtype", "-"],
             input=text.encode("utf-8"),
@@ -98,7 +255,24 @@ def _type_text(text: str):
         )
 
 
+def _quartz():
+    """The Quartz typing backend (macOS), or None without pyobjc."""
+    try:
+        import quartz_keyboard
+    except ImportError:
+        return None
+    return quartz_keyboard
+
+
 def _type_macos(text: str):
+    quartz = _quartz()
+    if quartz is not None:
+        quartz.type_text(text)
+    else:
+        _type_osascript(text)
+
+
+def _type_osascript(text: str):
     # keystroke can't type a linefeed from a string — send Return between lines
     for i, line in enumerate(text.split("\n")):
         if i > 0:
@@ -129,6 +303,10 @@ def _inject_macos(text: str):
         stderr=subprocess.DEVNULL,
     )
     time.sleep(PASTE_DELAY)
+    quartz = _quartz()
+    if quartz is not None:
+        quartz.paste()
+        return
     subprocess.run(
         [
             "osascript",
@@ -140,6 +318,41 @@ def _inject_macos(text: str):
     )
 
 
+_BENCH_SAMPLE = (
+    "The quick brown fox jumps over the lazy dog, twice.\n"
+    "Pack my box with five dozen liquor jugs; then 1, 2, 3.\n"
+    "Sphinx of black quartz, judge my vow!\n"
+)
+
+
+def bench_typing(rounds: int = 3) -> list:
+    """Type a sample with each available typing backend into the focused app.
+
+    Returns [(backend, chars/sec)] — the old per-call path next to the
+    persistent one (osascript vs Quartz on macOS; wtype/xdotool vs uinput on
+    Linux).
+    """
+    backends = []
+    if _IS_MACOS:
+        backends.append(("osascript", _type_osascript))
+        if _quartz() is not None:
+            backends.append(("Quartz", _quartz().type_text))
+    else:
+        if _HAS_WTYPE if _IS_WAYLAND else _HAS_XDOTOOL:
+            backends.append(("wtype" if _IS_WAYLAND else "xdotool", _type_subprocess))
+        kbd = _keyboard()
+        if kbd is not None:
+            backends.append(("uinput", kbd.type))
+    results = []
+    for name, type_text in backends:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            type_text(_BENCH_SAMPLE)
+        elapsed = time.perf_counter() - start
+        results.append((name, rounds * len(_BENCH_SAMPLE) / elapsed))
+    return results
+
+
 def _inject_linux(text: str):
     if _IS_WAYLAND:
         _inject_linux_wayland(text)
@@ -162,22 +375,13 @@ def _inject_linux_wayland(text: str):
 
 
 def _send_ctrl_v_uinput():
-    from evdev import UInput, ecodes as e
+    from evdev import ecodes as e
 
-    capabilities = {e.EV_KEY: [e.KEY_LEFTCTRL, e.KEY_V]}
-    ui = UInput(capabilities, name="voza-virtual-kbd")
-    try:
-        time.sleep(0.05)
-        ui.write(e.EV_KEY, e.KEY_LEFTCTRL, 1)
-        ui.write(e.EV_KEY, e.KEY_V, 1)
-        ui.syn()
-        time.sleep(0.02)
-        ui.write(e.EV_KEY, e.KEY_V, 0)
-        ui.write(e.EV_KEY, e.KEY_LEFTCTRL, 0)
-        ui.syn()
-        time.sleep(0.02)
-    finally:
-        ui.close()
+    kbd = _paste_keyboard()
+    if kbd is None:
+        raise RuntimeError("Cannot open /dev/uinput to send the paste shortcut. "
+                           "Is your user in the 'input' group?")
+    kbd.combo(e.KEY_LEFTCTRL, e.KEY_V)
 
 
 def _inject_linux_x11(text: str):
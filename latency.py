@@ -0,0 +1,73 @@
+"""Latency-adaptive cleanup skip threshold.
+
+LLM cleanup is worth its latency once a dictation is long enough. Cleanup
+requests feed an EWMA per backend/model of time-to-first-token and
+generation time per word. skip_threshold() compares those, plus the time
+already spent transcribing, against VOZA_LATENCY_TARGET: a dictation of n
+words goes to the LLM when
+
+    transcription + first_token + n * per_word <= target + n * allowance
+
+i.e. the end-to-end target, loosened by `allowance` seconds per dictated word
+(a long dictation can wait a little longer for better text). Solving for n
+gives the threshold. A slow or struggling Ollama raises it; fast GPT responses
+lower it.
+"""
+
+import math
+import threading
+
+from config import LATENCY_TARGET, VOZA_MODE
+
+_ALPHA = 0.3  # EWMA weight of the newest sample
+_ALLOWANCE_PER_WORD = 0.1  # seconds of extra latency tolerated per dictated word
+_MIN_THRESHOLD = 5
+_MAX_THRESHOLD = 40
+# Until a backend has been measured (and with VOZA_LATENCY_TARGET=0):
+# Ollama is slower than GPT-4o-mini, so local mode skips more.
+_DEFAULT_THRESHOLD = 20 if VOZA_MODE == "local" else 15
+
+_first_token = {}  # route → EWMA seconds to first token
+_per_word = {}  # route → EWMA seconds per generated word
+_lock = threading.Lock()
+
+
+def _ewma(table: dict, route: str, sample: float):
+    old = table.get(route)
+    table[route] = sample if old is None else old + _ALPHA * (sample - old)
+
+
+def record_cleanup(route: str, first_token, total: float, words: int):
+    """Add one cleanup request's timing (first_token is None when not streamed)."""
+    with _lock:
+        if first_token is not None and words > 0:
+            _ewma(_per_word, route, max(0.0, total - first_token) / words)
+        if first_token is None:
+            # Not streamed: take the modelled generation time out of the total
+            first_token = max(0.0, total - _per_word.get(route, 0.0) * words)
+        _ewma(_first_token, route, first_token)
+
+
+def skip_threshold(route: str, transcribe_seconds: float) -> int:
+    """Word count at or below which cleanup skips the LLM for `route`. Logs the decision."""
+    with _lock:
+        first_token = _first_token.get(route)
+        per_word = _per_word.get(route)
+    if LATENCY_TARGET <= 0 or first_token is None:
+        why = "target off" if LATENCY_TARGET <= 0 else f"no {route} measurements yet"
+        print(f"  [Latency] Skip threshold {_DEFAULT_THRESHOLD} words (default — {why})")
+        return _DEFAULT_THRESHOLD
+
+    per_word = per_word or 0.0
+    over = transcribe_seconds + first_token - LATENCY_TARGET
+    gain = _ALLOWANCE_PER_WORD - per_word
+    if over <= 0:
+        threshold = _MIN_THRESHOLD
+    elif gain <= 0:
+        threshold = _MAX_THRESHOLD  # generation alone outruns the allowance
+    else:
+        threshold = min(_MAX_THRESHOLD, max(_MIN_THRESHOLD, math.ceil(over / gain)))
+    print(f"  [Latency] Skip threshold {threshold} words (transcribe {transcribe_seconds:.2f}s, "
+          f"{route}: first token {first_token:.2f}s, {per_word * 1000:.0f} ms/word; "
+          f"target {LATENCY_TARGET:.1f}s)")
+    return threshold
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 """Voza — AI-powered voice-to-text dictation."""
 
+import time
+
+_PROCESS_START = time.monotonic()
 
+import argparse
+import os
 import sys
 import threading
-import time
-
-import numpy as np
-import sounddevice as sd
+from contextlib import contextmanager
 
 _IS_MACOS = sys.platform == "darwin"
 
@@ -18,51 +20,131 @@ else:
     import evdev.ecodes as e
 
 import config
-from recorder import Recorder, _SILENCE_THRESHOLD, _HAS_FFMPEG
-from transcriber import transcribe
-from enhancer import enhance, enhance_stream
-from injector import inject, can_stream, StreamTyper
+
+# numpy, sounddevice and the API clients (openai) are slow to import, and mic
+# probing records from every device, so none of it happens at import time:
+# _init_pipeline() loads them on a background thread once the hotkey listener
+# is armed, and the functions below import what they need locally.
 
 
 # ---------------------------------------------------------------------------
 # State
 # ---------------------------------------------------------------------------
 
-recorder = Recorder()
-processing_lock = threading.Lock()
+recorder = None  # Recorder, created by _init_pipeline()
+
+
+class _Turn:
+    """One dictation's place in line.
+
+    Dictations are processed concurrently but inject text in the order
+    spoken: output waits for `prev_done` (the previous dictation finished),
+    so a short second dictation can't land before (or inside) a long first
+    one. Dictations also enter the cleanup stage in order, so a later one
+    waiting for its turn to type never holds the cleanup worker an earlier
+    one needs.
+    """
+
+    def __init__(self, prev):
+        import asyncio
+        from concurrent.futures import Future
+
+        if prev is None:
+            self.prev_done = Future()
+            self.prev_done.set_result(None)
+            self._prev_cleanup = None
+        else:
+            self.prev_done = prev.done
+            self._prev_cleanup = prev.cleanup
+        self.done = Future()
+        self.cleanup = asyncio.Event()  # this dictation reached (or skipped) cleanup
+
+    def held(self) -> bool:
+        """Whether this dictation's output is waiting its turn (or for the hotkey)."""
+        return not self.prev_done.done() or not _hotkey_idle.is_set()
+
+    async def enter_cleanup(self):
+        if self._prev_cleanup is not None:
+            await self._prev_cleanup.wait()
+        self.cleanup.set()
+
+    async def finish(self):
+        """Mark this dictation done — after the previous one, so the chain stays ordered."""
+        import asyncio
+
+        self.cleanup.set()
+        await asyncio.wrap_future(self.prev_done)
+        self.done.set_result(None)
+
+
+class _OutputOrder:
+    """Hands out _Turns in recording order (called from the hotkey listener)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = None
+
+    def turn(self) -> _Turn:
+        with self._lock:
+            self._last = _Turn(self._last)
+            return self._last
+
+    def drain(self, timeout: float) -> bool:
+        """Wait for every dictation handed out so far to finish; False on timeout."""
+        from concurrent.futures import TimeoutError as FutureTimeout
+
+        with self._lock:
+            last = self._last
+        if last is None:
+            return True
+        try:
+            last.done.result(timeout=timeout)
+            return True
+        except FutureTimeout:
+            return False
+
+
+_output_order = _OutputOrder()
+# Clear while the hotkey is held: text typed then would combine with the
+# held modifiers (and land mid-recording), so injection waits for release.
+_hotkey_idle = threading.Event()
+_hotkey_idle.set()
+
+# Set once the mic is resolved and checked (recording can start), and once
+# transcription/cleanup and the API clients are loaded (processing can run).
+_audio_ready = threading.Event()
+_pipeline_ready = threading.Event()
+_listener_ready = threading.Event()
 
-_PROCESS_START = time.monotonic()
 # If a hang recurs within this many seconds of launch, don't loop forever: stop
 # and let the user restart manually. A fresh process almost always clears it.
 _MIN_UPTIME_BEFORE_RESTART = 30
 
 
+def _is_recording() -> bool:
+    return recorder is not None and recorder.is_recording
+
+
 def _restart_on_hang(reason):
     """Called when the audio device deadlocks mid-recording.
 
     CoreAudio keeps the mic open until the process dies, so exit and let the
     launch wrapper (start.sh / Voza.app) respawn a fresh instance."""
-    import os as _os
     print("\n" + reason, flush=True)
 
     # The hang fires ~2s after the hotkey was released, so the just-recorded
-    # dictation is usually still mid-transcription. Wait (bounded) for the
-    # pipeline to finish pasting before killing the process.
-    if processing_lock.acquire(timeout=30):
-        processing_lock.release()
-    else:
-        print("In-flight dictation didn't finish in 30s; restarting anyway.",
+    # dictation (and any still queued before it) is usually mid-pipeline.
+    # Wait (bounded) for them all to finish pasting before killing the process.
+    if not _output_order.drain(timeout=30):
+        print("In-flight dictations didn't finish in 30s; restarting anyway.",
               flush=True)
 
     if time.monotonic() - _PROCESS_START < _MIN_UPTIME_BEFORE_RESTART:
         print("Not auto-restarting (hang too soon after launch). "
               "Restart Voza manually.", flush=True)
-        _os._exit(0)
+        os._exit(0)
     print("Restarting Voza...", flush=True)
-    _os._exit(1)
-
-
-recorder.on_hang = _restart_on_hang
+    os._exit(1)
 
 
 # ---------------------------------------------------------------------------
@@ -71,8 +153,17 @@ recorder.on_hang = _restart_on_hang
 
 def _check_mic():
     """Record a short sample to verify the default mic is alive. Exit if dead."""
+    import numpy as np
+    import sounddevice as sd
+    from recorder import _SILENCE_THRESHOLD
+
     print("  Checking microphone...", end=" ", flush=True)
 
+    # Auto-detect just recorded from this device; don't record it again.
+    if config.PROBE_PEAK is not None and config.PROBE_PEAK >= _SILENCE_THRESHOLD:
+        print(f"OK (peak={config.PROBE_PEAK}, from auto-detect)")
+        return
+
     duration = 0.5  # half-second test
     # A silent read at login often means the audio stack is still coming up,
     # not a dead mic — retry a few times before giving up for good.
@@ -99,7 +190,7 @@ def _check_mic():
         # Run the recording under a watchdog. A busy CoreAudio device (e.g. right
         # after another app released the mic, or a Continuity device waking up) can
         # make sd.wait() block forever — which would wedge startup before the
-        # hotkey listener ever starts. If it doesn't finish in time, warn and move
+        # first dictation can ever record. If it doesn't finish in time, warn and move
         # on: config's auto-detect probe already confirmed the mic records.
         worker = threading.Thread(target=_record, daemon=True)
         worker.start()
@@ -180,83 +271,273 @@ _HALLUCINATION_WORDS = {
 # longer holds. Below this, short answers like "yes"/"no" paste normally.
 _HALLUCINATION_MIN_DURATION = 3.0
 
+# Per-stage timeouts (seconds). The HTTP clients have their own, shorter
+# timeouts; these bound a stage as a whole, retries and fallbacks included.
+_TRANSCRIBE_TIMEOUT = 90.0
+_CLEANUP_TIMEOUT = 60.0
+# Streamed cleanup includes typing, and waiting for earlier dictations to type
+_STREAM_TIMEOUT = 180.0
+_OUTPUT_TIMEOUT = 30.0
 
-def _process_audio(audio_buffer, duration):
-    """Run the Whisper → LLM → paste pipeline."""
-    with processing_lock:
-        raw_text = None
-        cleaned_text = None
 
+async def _process_audio(audio_buffer, duration, turn, session=None, trace=None):
+    """Run the Whisper → LLM → paste pipeline for one dictation (a core task).
+
+    With segment upload, `session` already holds the segments transcribed
+    while recording and `audio_buffer` is only the tail (or None). Runs
+    alongside the pipelines of other dictations; `turn` orders their output.
+    `trace` (VOZA_TRACE) collects the dictation's timings.
+    """
+    import tracing
+
+    released = time.monotonic()
+    tracing.activate(trace)
+    try:
+        await _dictate(audio_buffer, duration, turn, session, released)
+    except Exception as exc:
+        print(f"Error: Dictation failed: {exc}")
+    finally:
+        await turn.finish()
+        tracing.finish(trace)
+    print("Ready.")
+
+
+async def _dictate(audio_buffer, duration, turn, session, released):
+    import asyncio
+    import core
+
+    while not _pipeline_ready.is_set():
+        await asyncio.sleep(0.05)
+
+    import cleanup_rules
+    import latency
+    from enhancer import current_route, enhance
+    from hedge import CancelToken
+    from injector import can_stream
+
+    try:
+        raw_text, rest = await core.stage(
+            "transcribe", _transcribe, audio_buffer, session, timeout=_TRANSCRIBE_TIMEOUT,
+        )
+    except Exception as exc:
+        print(f"Error: Whisper transcription failed: {exc}")
+        return
+    await turn.enter_cleanup()
+
+    if rest is not None:
+        cancel = CancelToken()
+        await core.stage("cleanup", _type_incremental, raw_text, rest, turn, cancel,
+                         timeout=_STREAM_TIMEOUT, cancel=cancel, held=turn.held)
+        return
+    print(f"  [Whisper] {raw_text}")
+
+    # Guard against Whisper hallucinations from silent/bad audio: a lone
+    # filler word out of a long recording means the audio was noise, but a
+    # quick press saying "okay" is real dictation and must paste.
+    stripped = raw_text.strip().strip(".!?,").lower()
+    if stripped in _HALLUCINATION_WORDS and duration >= _HALLUCINATION_MIN_DURATION:
+        print("  [Warning] Likely mic issue — transcript looks like a hallucination.")
+        print("  Check your audio input device. Skipping paste.")
+        return
+
+    # Mechanical fixes (fillers, spoken punctuation, number sequences,
+    # capitals) are rule-based; the LLM only sees dictations that need
+    # judgment. Short phrases skip it regardless — how short depends on
+    # how fast cleanup has been lately (see latency.py).
+    skip_threshold = latency.skip_threshold(current_route(), time.monotonic() - released)
+    ruled_text = cleanup_rules.clean(raw_text) if config.CLEANUP_RULES else raw_text
+    if len(raw_text.split()) <= skip_threshold:
+        reason = "short phrase"
+    elif config.CLEANUP_RULES and not cleanup_rules.needs_llm(ruled_text):
+        reason = "rules were enough"
+    else:
+        reason = None
+    if reason is not None:
+        if not ruled_text:
+            print("  [Cleanup] Nothing left after removing fillers. Skipping paste.")
+        else:
+            print(f"  [Cleanup] Skipped LLM ({reason})")
+            await _output(turn, ruled_text)
+        return
+
+    # Streaming path: type cleaned text into the active app as it arrives
+    if config.STREAM_OUTPUT and can_stream():
+        cancel = CancelToken()
+        await core.stage("cleanup", _stream_cleanup, raw_text, turn, cancel,
+                         timeout=_STREAM_TIMEOUT, cancel=cancel, held=turn.held)
+        return
+
+    # Non-streaming path: full cleanup, then one paste
+    try:
+        cleaned_text = await core.stage("cleanup", enhance, raw_text, timeout=_CLEANUP_TIMEOUT)
+    except Exception as exc:
+        print(f"Warning: Cleanup failed ({exc}). Using raw transcript.")
+        cleaned_text = raw_text
+    await _output(turn, cleaned_text)
+
+
+def _transcribe(audio_buffer, session):
+    """Transcription stage: (raw_text, rest).
+
+    `rest` is None once the transcript is complete. With streaming
+    transcription of a long dictation and chunked cleanup, raw_text is its
+    finished start and `rest` yields the sentences still being decoded.
+    Without chunked cleanup the decoded sentences are collected to the end:
+    one cleanup request needs the whole text anyway.
+    """
+    import cleanup_rules
+    import transcriber
+    from injector import can_stream
+
+    incremental = config.STREAM_TRANSCRIBE and config.STREAM_OUTPUT and can_stream() \
+        and (session is not None or transcriber.STREAMS)
+    if not incremental:
+        if session is not None:
+            return session.finish(audio_buffer), None
+        return transcriber.transcribe(audio_buffer), None
+
+    if session is not None:
+        deltas = session.stream(audio_buffer)
+    else:
+        deltas = transcriber.transcribe_stream(audio_buffer)
+    rest = transcriber.sentences(deltas)
+    head = []
+    # Past the rules' limit the dictation goes to the LLM anyway, so chunked
+    # cleanup can start on the finished sentences right away.
+    for sentence in rest:
+        head.append(sentence)
+        if config.PARALLEL_CLEANUP and len(" ".join(head).split()) > cleanup_rules.MAX_WORDS:
+            return " ".join(head), rest
+    return " ".join(head), None  # decoded completely; handle as usual
+
+
+async def _output(turn, text: str):
+    """Paste `text` once every earlier dictation's output has landed."""
+    import asyncio
+    import core
+
+    # Wait for our turn here, not on an output worker, so the stage's timeout
+    # only covers the paste itself
+    await asyncio.wrap_future(turn.prev_done)
+    await _hotkey_released()
+    try:
+        await core.stage("output", _paste, text, turn, timeout=_OUTPUT_TIMEOUT, held=turn.held)
+    except core.StageTimeout as exc:
+        print(f"Error: Failed to paste text: {exc}")
+
+
+def _stream_cleanup(raw_text: str, turn, cancel):
+    """Cleanup stage, streamed: type the cleaned text as it is generated."""
+    from enhancer import enhance_stream
+    from injector import StreamTyper
+
+    typer = StreamTyper(gate=_hotkey_gate, after=turn.prev_done, cancel=cancel)
+    try:
+        for chunk in enhance_stream(raw_text, cancel=cancel):
+            if cancel.is_set():
+                break
+            typer.feed(chunk)
+        typer.close()
+    except Exception as exc:
         try:
-            raw_text = transcribe(audio_buffer)
-            print(f"  [Whisper] {raw_text}")
-        except Exception as exc:
-            print(f"Error: Whisper transcription failed: {exc}")
-            print("Ready.")
+            typer.close()
+        except Exception:
+            pass  # typing is already broken; keep the fallback path alive
+        if cancel.is_set():
+            return  # timed out; the stage reports it
+        if typer.text:
+            print(f"Warning: Stream interrupted ({exc}). Partial text was typed.")
+            print(f"  Raw transcript was: {raw_text}")
             return
+        print(f"Warning: Cleanup failed ({exc}). Using raw transcript.")
+        _paste(raw_text, turn)
+        return
+
+    if cancel.is_set():
+        return
+    if typer.text.strip():
+        print(f"  [Typed] {typer.text}")
+    else:
+        # Model returned nothing — fall back to the raw transcript
+        _paste(raw_text, turn)
 
-        # Guard against Whisper hallucinations from silent/bad audio: a lone
-        # filler word out of a long recording means the audio was noise, but a
-        # quick press saying "okay" is real dictation and must paste.
-        stripped = raw_text.strip().strip(".!?,").lower()
-        if stripped in _HALLUCINATION_WORDS and duration >= _HALLUCINATION_MIN_DURATION:
-            print("  [Warning] Likely mic issue — transcript looks like a hallucination.")
-            print("  Check your audio input device. Skipping paste.")
-            print("Ready.")
-            return
 
-        # Short phrases don't need LLM cleanup — skip to save time
-        # Higher threshold for local mode (Ollama is slower than GPT-4o-mini)
-        skip_threshold = 20 if config.VOZA_MODE == "local" else 15
-        if len(raw_text.split()) <= skip_threshold:
-            print("  [Cleanup] Skipped (short phrase)")
-            _paste(raw_text)
-            print("Ready.")
-            return
+def _type_incremental(head_text: str, rest, turn, cancel):
+    """Clean and type a dictation whose transcript is still being decoded.
 
-        # Streaming path: type cleaned text into the active app as it arrives
-        if config.STREAM_OUTPUT and can_stream():
-            typer = StreamTyper()
-            try:
-                for chunk in enhance_stream(raw_text):
-                    typer.feed(chunk)
-                typer.close()
-            except Exception as exc:
-                try:
-                    typer.close()
-                except Exception:
-                    pass  # typing is already broken; keep the fallback path alive
-                if typer.text:
-                    print(f"Warning: Stream interrupted ({exc}). Partial text was typed.")
-                    print(f"  Raw transcript was: {raw_text}")
-                    print("Ready.")
-                    return
-                print(f"Warning: Cleanup failed ({exc}). Using raw transcript.")
-                _paste(raw_text)
-                print("Ready.")
-                return
+    `head_text` is the finished start of the transcript and `rest` yields the
+    sentences finished after it. Chunks go to cleanup as soon as they are
+    complete and are typed in order, so typing starts while Whisper is still
+    working on later audio. Only finished sentences are sent, so nothing typed
+    ever has to be taken back.
+    """
+    import itertools
+    from enhancer import chunk_sentences, enhance_chunks
+    from injector import StreamTyper
 
-            if typer.text.strip():
-                print(f"  [Typed] {typer.text}")
-            else:
-                # Model returned nothing — fall back to the raw transcript
-                _paste(raw_text)
-            print("Ready.")
-            return
+    print(f"  [Whisper] {head_text} …")
+    raw_parts = [head_text]
+
+    def remaining():
+        for sentence in rest:
+            if cancel.is_set():
+                return
+            raw_parts.append(sentence)
+            yield sentence
 
-        # Non-streaming path: full cleanup, then one paste
+    typer = StreamTyper(gate=_hotkey_gate, after=turn.prev_done, cancel=cancel)
+    try:
+        chunks = itertools.chain([head_text], chunk_sentences(remaining()))
+        for chunk in enhance_chunks(chunks, cancel=cancel):
+            if cancel.is_set():
+                break
+            typer.feed(chunk)
+        typer.close()
+    except Exception as exc:
         try:
-            cleaned_text = enhance(raw_text)
-        except Exception as exc:
+            typer.close()
+        except Exception:
+            pass  # typing is already broken; report what we have
+        if cancel.is_set():
+            return
+        raw_text = " ".join(raw_parts)
+        if typer.text:
+            print(f"Warning: Stream interrupted ({exc}). Partial text was typed.")
+            print(f"  Raw transcript so far: {raw_text}")
+        else:
             print(f"Warning: Cleanup failed ({exc}). Using raw transcript.")
-            cleaned_text = raw_text
+            _paste(raw_text, turn)
+        return
+    if cancel.is_set():
+        return
+    print(f"  [Whisper] {' '.join(raw_parts)}")
+    print(f"  [Typed] {typer.text}")
 
-        _paste(cleaned_text)
-        print("Ready.")
 
+def _hotkey_gate():
+    """Hold output while the hotkey is down (typing then would hit the held modifiers)."""
+    if not _hotkey_idle.is_set():
+        _hotkey_idle.wait()
+        time.sleep(config.PASTE_DELAY)  # let the hotkey modifiers settle
+
+
+async def _hotkey_released():
+    """_hotkey_gate() for the core loop: waits without holding a worker."""
+    import asyncio
+
+    if _hotkey_idle.is_set():
+        return
+    while not _hotkey_idle.is_set():
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(config.PASTE_DELAY)  # let the hotkey modifiers settle
 
-def _paste(text: str):
+
+def _paste(text: str, turn):
     """Inject text via clipboard + paste keystroke, logging the outcome."""
+    from injector import inject
+
+    turn.prev_done.result()  # earlier dictations' text goes first
+    _hotkey_gate()
     try:
         inject(text)
         print(f"  [Pasted] {text}")
@@ -265,13 +546,91 @@ def _paste(text: str):
         print(f"  Text was: {text}")
 
 
+# ---------------------------------------------------------------------------
+# Hotkey handling (shared by both listeners)
+# ---------------------------------------------------------------------------
+
+_session = None  # SegmentedTranscription for the recording in progress
+_trace = None  # tracing.Trace for the recording in progress (VOZA_TRACE)
+
+
+def _start_recording():
+    """Hotkey down: begin capturing (and segment uploading, if enabled)."""
+    global _session, _trace
+    import tracing
+    # Don't block the listener (macOS disables a slow event tap): a press
+    # during startup is dropped with a note instead.
+    if not _audio_ready.is_set():
+        print("Still starting up (checking microphone) — try again in a moment.")
+        return
+    _trace = tracing.begin()
+    _session = None
+    if config.SEGMENT_UPLOAD and _pipeline_ready.is_set():
+        from transcriber import SegmentedTranscription
+        _session = SegmentedTranscription()
+    recorder.on_segment = _session.submit if _session is not None else None
+    try:
+        recorder.start()
+    except Exception as exc:
+        # Keep the listener alive; the next press tries again
+        print(f"Error: Could not start recording: {exc}")
+        _session = _trace = None
+        return
+    _hotkey_idle.clear()
+    if _pipeline_ready.is_set():
+        import api_client
+        api_client.preconnect()
+        if config.VOZA_MODE == "local" and config.KEEP_WARM:
+            import warmup
+            warmup.touch()
+    print("Recording... (release to stop)")
+
+
+def _stop_recording(silent_hint: str):
+    """Hotkey up: stop capturing and hand the audio to the pipeline core."""
+    global _session, _trace
+    import tracing
+
+    print("Processing...")
+    session, _session = _session, None
+    trace, _trace = _trace, None
+    tracing.mark("hotkey_up")
+    audio_buffer = recorder.stop()
+    _hotkey_idle.set()
+
+    if session is not None and not session.pending:
+        session = None  # nothing was cut mid-recording; transcribe as one clip
+    elif session is not None:
+        print(f"  [Segments] {recorder.last_segments} uploaded while recording")
+
+    if audio_buffer is None and session is None:
+        reason = recorder.last_stop_reason
+        if reason == "silent":
+            print("  Mic appears silent/dead. Check your input device.")
+            print(f"  Try: {silent_hint}")
+        else:
+            print("  No audio captured (too short).")
+        print("Ready.")
+        return
+
+    tracing.field("audio_seconds", round(recorder.last_duration, 2))
+    import core
+    core.submit(_process_audio(audio_buffer, recorder.last_duration, _output_order.turn(),
+                               session, trace))
+
+
 # ---------------------------------------------------------------------------
 # Banner
 # ---------------------------------------------------------------------------
 
 def _print_banner():
+    import sounddevice as sd
+    from recorder import _PREROLL_SECONDS, encoder_label
+    from injector import can_stream
+
     dev_info = sd.query_devices(config.AUDIO_DEVICE, kind='input')
     mode_label = config.VOZA_MODE.upper()
+    edits_label = ", edit scripts" if config.CLEANUP_MODE == "edits" else ""
 
     print("=" * 50)
     print("  Voza — AI-Powered Voice-to-Text")
@@ -282,13 +641,25 @@ def _print_banner():
     print(f"  Mic:     [{config.AUDIO_DEVICE}] {dev_info['name']}")
 
     if config.VOZA_MODE == "local":
+        import health
         print(f"  Whisper: whisper-server @ {config.WHISPER_SERVER_URL}")
-        print(f"  Cleanup: {config.LOCAL_CLEANUP_MODEL} (Ollama)")
+        print(f"  Cleanup: {config.LOCAL_CLEANUP_MODEL} (Ollama){edits_label}")
+        print(f"  Health:  {health.status()}")
+        if config.KEEP_WARM:
+            print(f"  Warm-up: On (Ollama keep-alive {config.OLLAMA_KEEP_ALIVE})")
     else:
-        print(f"  Whisper: {config.WHISPER_MODEL}")
-        print(f"  Cleanup: {config.CLEANUP_MODEL}")
+        if config.STREAM_TRANSCRIBE:
+            print(f"  Whisper: {config.STREAM_TRANSCRIBE_MODEL} (streaming)")
+        else:
+            print(f"  Whisper: {config.WHISPER_MODEL}")
+        print(f"  Cleanup: {config.CLEANUP_MODEL}{edits_label}")
 
-    print(f"  Compress: {'OGG/Opus (ffmpeg)' if _HAS_FFMPEG else 'Off (install ffmpeg to enable)'}")
+    print(f"  Compress: {encoder_label()}")
+    if config.WARM_STREAM:
+        print(f"  Capture: Warm stream ({int(_PREROLL_SECONDS * 1000)} ms pre-roll)")
+    else:
+        print("  Capture: Stream opened per dictation")
+    print(f"  Segments: {'On (upload at pauses while recording)' if config.SEGMENT_UPLOAD else 'Off'}")
 
     if config.STREAM_OUTPUT:
         stream_label = "On" if can_stream() else "Off (not supported on this setup)"
@@ -363,42 +734,25 @@ if _IS_MACOS:
 
             if quit_combo <= pressed_keys:
                 print("\nQuitting Voza. Goodbye!")
-                import os as _os; _os._exit(0)
+                if recorder is not None:
+                    recorder.close()
+                os._exit(0)
 
-            if record_combo <= pressed_keys and not recorder.is_recording:
-                if processing_lock.locked():
-                    return
-                recorder.start()
-                print("Recording... (release to stop)")
+            if record_combo <= pressed_keys and not _is_recording():
+                _start_recording()
 
         def on_release(key):
             key = _normalize_key(key)
 
-            if recorder.is_recording and key in record_combo:
-                print("Processing...")
-                audio_buffer = recorder.stop()
+            if _is_recording() and key in record_combo:
                 pressed_keys.discard(key)
-
-                if audio_buffer is None:
-                    reason = recorder.last_stop_reason
-                    if reason == "silent":
-                        print("  Mic appears silent/dead. Check your input device.")
-                        print("  Try: System Settings > Sound > Input, or restart the app.")
-                    else:
-                        print("  No audio captured (too short).")
-                    print("Ready.")
-                    return
-
-                threading.Thread(
-                    target=_process_audio,
-                    args=(audio_buffer, recorder.last_duration),
-                    daemon=True,
-                ).start()
+                _stop_recording("System Settings > Sound > Input, or restart the app.")
             else:
                 pressed_keys.discard(key)
 
-        _print_banner()
         with keyboard.Listener(on_press=on_press, on_release=on_release) as listener:
+            _profile.mark("listener ready")
+            _listener_ready.set()
             try:
                 listener.join()
             except KeyboardInterrupt:
@@ -472,8 +826,8 @@ if not _IS_MACOS:
 
         dev = _find_keyboard_device()
         print(f"  Keyboard: {dev.name} ({dev.path})")
-
-        _print_banner()
+        _profile.mark("listener ready")
+        _listener_ready.set()
 
         try:
             for event in dev.read_loop():
@@ -488,35 +842,17 @@ if not _IS_MACOS:
 
                     if _combo_active(quit_combo, pressed):
                         print("\nQuitting Voza. Goodbye!")
-                        import os as _os; _os._exit(0)
+                        if recorder is not None:
+                            recorder.close()
+                        os._exit(0)
 
-                    if _combo_active(record_combo, pressed) and not recorder.is_recording:
-                        if processing_lock.locked():
-                            continue
-                        recorder.start()
-                        print("Recording... (release to stop)")
+                    if _combo_active(record_combo, pressed) and not _is_recording():
+                        _start_recording()
 
                 elif key_event.keystate == evdev.KeyEvent.key_up:
-                    if recorder.is_recording and _combo_contains(record_combo, code):
-                        print("Processing...")
-                        audio_buffer = recorder.stop()
+                    if _is_recording() and _combo_contains(record_combo, code):
                         pressed.discard(code)
-
-                        if audio_buffer is None:
-                            reason = recorder.last_stop_reason
-                            if reason == "silent":
-                                print("  Mic appears silent/dead. Check your input device.")
-                                print("  Try: pavucontrol or alsamixer to check input levels, or restart the app.")
-                            else:
-                                print("  No audio captured (too short).")
-                            print("Ready.")
-                            continue
-
-                        threading.Thread(
-                            target=_process_audio,
-                            args=(audio_buffer, recorder.last_duration),
-                            daemon=True,
-                        ).start()
+                        _stop_recording("pavucontrol or alsamixer to check input levels, or restart the app.")
                     else:
                         pressed.discard(code)
 
@@ -525,13 +861,146 @@ if not _IS_MACOS:
             sys.exit(0)
 
 
+# ---------------------------------------------------------------------------
+# Startup
+# ---------------------------------------------------------------------------
+
+class _StartupProfile:
+    """Per-phase startup timings, printed with --profile-startup."""
+
+    def __init__(self):
+        self.enabled = False
+        self._phases = []  # (name, start, end), seconds since launch
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end):
+        with self._lock:
+            self._phases.append((name, start - _PROCESS_START, end - _PROCESS_START))
+
+    def mark(self, name):
+        now = time.monotonic()
+        self.record(name, now, now)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.monotonic())
+
+    def report(self):
+        with self._lock:
+            phases = sorted(self._phases, key=lambda p: p[2])
+        print("Startup profile (ms since launch):")
+        print(f"  {'phase':<22}{'start':>8}{'took':>8}")
+        for name, start, end in phases:
+            took = f"{(end - start) * 1000:.0f}" if end > start else "-"
+            print(f"  {name:<22}{start * 1000:>8.0f}{took:>8}")
+        print()
+
+
+_profile = _StartupProfile()
+
+
+def _init_pipeline():
+    """Background startup: load the heavy modules, resolve and check the mic,
+    build the API clients. Runs while the hotkey listener is already armed."""
+    global recorder
+    try:
+        with _profile.phase("imports (audio)"):
+            from recorder import Recorder
+        with _profile.phase("mic probe"):
+            config.init_audio_device()
+        with _profile.phase("mic check"):
+            _check_mic()
+        recorder = Recorder()
+        recorder.on_hang = _restart_on_hang
+        if config.WARM_STREAM:
+            with _profile.phase("warm stream"):
+                try:
+                    recorder.open()
+                except Exception as exc:
+                    # Not fatal: the first hotkey press retries the open.
+                    print(f"  Warning: Could not open the warm input stream: {exc}")
+        _audio_ready.set()
+
+        with _profile.phase("imports (pipeline)"):
+            import transcriber, enhancer, injector  # noqa: F401 — also builds the API clients
+        with _profile.phase("pipeline core"):
+            import core
+            core.start()
+        with _profile.phase("virtual keyboard"):
+            injector.prepare()
+        if config.VOZA_MODE == "local":
+            import health
+            with _profile.phase("health check"):
+                health.check_all()
+            if config.KEEP_WARM:
+                import warmup
+                warmup.start()
+        _pipeline_ready.set()
+    except SystemExit as exc:
+        # _check_mic exits on a dead mic; sys.exit() would only end this thread.
+        sys.stdout.flush()
+        os._exit(exc.code or 0)
+    except Exception as exc:
+        print(f"Error: Startup failed: {exc}", flush=True)
+        os._exit(1)
+
+    _print_banner()
+    if _profile.enabled:
+        _listener_ready.wait(timeout=5)
+        _profile.mark("ready for dictation")
+        _profile.report()
+
+
+def _bench_typing():
+    """--bench-typing: compare typing backends' chars/sec in the focused app."""
+    import injector
+    print("Focus an empty text editor — typing starts in 3 seconds...")
+    time.sleep(3)
+    results = injector.bench_typing()
+    if not results:
+        print("No typing backend available.")
+        return
+    print()
+    for name, rate in results:
+        print(f"  {name:<10} {rate:8.0f} chars/sec")
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
 def main():
+    main_start = time.monotonic()
+    parser = argparse.ArgumentParser(description="Voza — AI-powered voice-to-text dictation.")
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="print a per-phase startup timing breakdown",
+    )
+    parser.add_argument(
+        "--bench-typing", action="store_true",
+        help="type a sample text with each typing backend and print chars/sec",
+    )
+    parser.add_argument(
+        "--trace-summary", action="store_true",
+        help="print p50/p95 per pipeline stage from the recorded traces (VOZA_TRACE)",
+    )
+    args = parser.parse_args()
+    if args.trace_summary:
+        import tracing
+        print(tracing.summary())
+        return
+    if args.bench_typing:
+        _bench_typing()
+        return
+    _profile.enabled = args.profile_startup
+    _profile.record("imports (main)", _PROCESS_START, main_start)
+
     config.validate()
-    _check_mic()
+    threading.Thread(target=_init_pipeline, daemon=True).start()
 
     if _IS_MACOS:
         _run_macos()
@@ -0,0 +1,67 @@
+"""Native keyboard events on macOS (Quartz), for streamed typing and paste.
+
+Events are posted straight into the HID event stream from this process, so
+typing a chunk costs microseconds instead of an osascript launch (50-150 ms)
+per line. Text goes in as Unicode strings attached to key events — any
+character, independent of the keyboard layout — with Return for newlines.
+Modifier flags are cleared on every event, so keys still held from the hotkey
+don't turn typed text into shortcuts. Needs the same Accessibility permission
+as osascript keystrokes. Quartz comes with pynput (pyobjc).
+"""
+
+import threading
+
+import Quartz
+
+_RETURN = 36  # virtual key codes (kVK_Return, kVK_ANSI_V)
+_V = 9
+# Key events carry at most 20 UTF-16 units of text; the rest is dropped.
+_MAX_UNITS = 20
+
+_source = Quartz.CGEventSourceCreate(Quartz.kCGEventSourceStateHIDSystemState)
+_lock = threading.Lock()
+
+
+def type_text(text: str):
+    """Type `text` into the focused app."""
+    with _lock:
+        for i, line in enumerate(text.split("\n")):
+            if i > 0:
+                _key(_RETURN, 0)
+            for chunk in _chunks(line):
+                _unicode(chunk)
+
+
+def paste():
+    """Press Cmd+V."""
+    with _lock:
+        _key(_V, Quartz.kCGEventFlagMaskCommand)
+
+
+def _chunks(line: str):
+    chunk, units = "", 0
+    for ch in line:
+        n = 2 if ord(ch) > 0xFFFF else 1  # surrogate pairs stay together
+        if units + n > _MAX_UNITS:
+            yield chunk
+            chunk, units = "", 0
+        chunk += ch
+        units += n
+    if chunk:
+        yield chunk
+
+
+def _unicode(chunk: str):
+    units = len(chunk.encode("utf-16-le")) // 2
+    for down in (True, False):
+        event = Quartz.CGEventCreateKeyboardEvent(_source, 0, down)
+        Quartz.CGEventSetFlags(event, 0)
+        Quartz.CGEventKeyboardSetUnicodeString(event, units, chunk)
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
+
+
+def _key(code: int, flags: int):
+    for down in (True, False):
+        event = Quartz.CGEventCreateKeyboardEvent(_source, code, down)
+        Quartz.CGEventSetFlags(event, flags)
+        Quartz.CGEventPost(Quartz.kCGHIDEventTap, event)
@@ -1,13 +1,22 @@
+import functools
+import hashlib
 import io
+import math
+import queue
 import shutil
 import subprocess
+import tempfile
 import threading
 import wave
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 
 import numpy as np
 import sounddevice as sd
 
-from config import SAMPLE_RATE, CHANNELS, AUDIO_DEVICE
+import config
+import tracing
+import vad
+from config import SAMPLE_RATE, CHANNELS, STREAM_ENCODE, WARM_STREAM, VAD_TRIM
 
 # Peak amplitude below this = mic is silent/dead. A working built-in mic in a
 # quiet room measures peaks of ~17-52 (MacBook Air), a dead/disconnected mic ~0,
@@ -23,17 +32,408 @@ _STOP_TIMEOUT = 2.0
 # Check once at import time whether ffmpeg is available for OGG compression
 _HAS_FFMPEG = shutil.which("ffmpeg") is not None
 
+# Raw s16le PCM on stdin -> OGG/Opus on stdout
+_FFMPEG_OPUS = [
+    "ffmpeg", "-y", "-loglevel", "error",
+    "-f", "s16le", "-ar", str(SAMPLE_RATE), "-ac", str(CHANNELS),
+    "-i", "pipe:0",
+    "-c:a", "libopus",
+    "-b:a", "24k",       # 24kbps is plenty for speech
+    "-application", "voip",
+    "-f", "ogg", "pipe:1",
+]
+
+# Max seconds to wait at release for the streaming encoder to flush; past this
+# the recording is encoded one-shot instead.
+_ENCODE_TIMEOUT = 2.0
+
+# VAD trimming: the streaming encoder already skips the leading silence. Only
+# throw its payload away (and re-encode the trimmed audio) when trimming the
+# rest would remove at least this many seconds and this fraction of the
+# recording — less isn't worth a second ffmpeg run on the critical path.
+_REENCODE_MIN_SECONDS = 0.5
+_REENCODE_FRACTION = 0.25
+
+
+def encoder_label() -> str:
+    """Human-readable name of the active audio encoder, for the banner."""
+    if not _HAS_FFMPEG:
+        return "Off (install ffmpeg to enable)"
+    if STREAM_ENCODE:
+        return "OGG/Opus (ffmpeg, streamed during capture)"
+    return "OGG/Opus (ffmpeg)"
+
+
+class _StreamEncoder:
+    """Encodes PCM to OGG/Opus while it is being captured.
+
+    One long-lived worker thread feeds each recording's blocks into an ffmpeg
+    process spawned on its first block, so when the hotkey comes up only the
+    last few milliseconds remain to encode. The stream callback only enqueues
+    and never blocks. ffmpeg writes into an anonymous temp file rather than a
+    pipe, so a long recording can't fill the pipe and stall the feeder.
+
+    With VAD trimming on, the worker also runs the VAD block by block: blocks
+    are held back until speech starts, so the payload begins at the speech
+    (`start` samples in), and its `keep` frame mask is ready when it's cut.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._proc = None
+        self._out = None
+        self._broken = False
+        self._reset_vad()
+
+    def _reset_vad(self):
+        self._vad = vad.Tracker() if VAD_TRIM else None
+        self._pending = []  # blocks held back until speech starts
+        self._start = 0
+
+    def start(self):
+        """Start the worker thread (idempotent; call off the audio thread)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def write(self, capture, audio):
+        self._queue.put((capture, audio))
+
+    def cut(self, capture, final=False) -> Future:
+        """End the current payload; the future resolves to its buffer, or None on failure.
+
+        `final` marks the end of the recording: blocks from `capture` that race
+        in after it are dropped rather than leaking into the next recording.
+        """
+        done = Future()
+        self._queue.put((capture, (done, final)))
+        return done
+
+    def _run(self):
+        while True:
+            capture, item = self._queue.get()
+            if isinstance(item, tuple):
+                done, final = item
+                if final:
+                    capture.encoded = True
+                done.set_result(self._finish())
+                continue
+            if capture.encoded or self._broken:
+                continue
+            if self._vad is not None:
+                self._vad.add(item)
+                if self._proc is None:
+                    self._pending.append(item)
+                    start = self._vad.onset()
+                    if start is None:
+                        continue
+                    item = np.concatenate(self._pending)[start:]
+                    self._pending = []
+                    self._start = start
+            try:
+                if self._proc is None:
+                    self._out = tempfile.TemporaryFile(prefix="voza-enc-")
+                    self._proc = subprocess.Popen(
+                        _FFMPEG_OPUS,
+                        stdin=subprocess.PIPE,
+                        stdout=self._out,
+                        stderr=subprocess.DEVNULL,
+                    )
+                self._proc.stdin.write(memoryview(item).cast("B"))
+            except Exception:
+                self._broken = True  # drop the rest; the caller encodes one-shot
+
+    def _finish(self):
+        proc, out, broken = self._proc, self._out, self._broken
+        start, keep = self._start, self._vad.keep() if self._vad is not None else None
+        self._proc = self._out = None
+        self._broken = False
+        self._reset_vad()
+        if proc is None:
+            return None
+        try:
+            if broken:
+                proc.kill()
+                return None
+            proc.stdin.close()
+            if proc.wait(timeout=_ENCODE_TIMEOUT) != 0:
+                return None
+            out.seek(0)
+            data = out.read()
+            if not data:
+                return None
+            ogg_buf = io.BytesIO(data)
+            ogg_buf.name = "recording.ogg"
+            ogg_buf.start = start  # samples of leading silence left out
+            ogg_buf.keep = keep  # VAD frame mask over the whole payload audio
+            return ogg_buf
+        except Exception:
+            proc.kill()
+            return None
+        finally:
+            out.close()
+
+
+_encoder = _StreamEncoder() if (_HAS_FFMPEG and STREAM_ENCODE) else None
+
+
+# Segment upload: cut the recording once the current segment is at least this
+# long and the speaker has paused for _SEGMENT_PAUSE_SECONDS. Shorter segments
+# give Whisper too little context, so don't cut more eagerly than this.
+_SEGMENT_MIN_SECONDS = 4.0
+_SEGMENT_PAUSE_SECONDS = 0.5
+
+# A block counts as a pause when its peak is under this fraction of the
+# loudest block heard so far — relative, so it adapts to mic gain.
+_PAUSE_RATIO = 0.1
+
+
+# Recording buffer: samples go into fixed-size chunks of this many seconds,
+# and a full chunk is followed by a new one — nothing captured is ever moved.
+# A typical dictation fits in the first chunk.
+_CHUNK_SECONDS = 30
+
+# Blocks are squared into a reused int64 scratch buffer this many samples at a time.
+_SCRATCH_SAMPLES = 8192
+
+
+class _BlockBuffer:
+    """Append-only int16 sample buffer with running level statistics.
+
+    write() copies each PortAudio block into preallocated storage and updates
+    peak and sum of squares as it goes, so stop() knows the recording's length,
+    peak and RMS in O(1). Nothing on that path allocates per block or copies
+    earlier audio: storage is a list of fixed-size chunks (np.empty only
+    reserves address space, so an unfilled chunk costs no more than the pages
+    it touches), and a block that doesn't fit in the rest of a chunk starts
+    the next one, so every block stays contiguous. view() is zero-copy within
+    a chunk; only a range across chunks is joined — off the audio thread.
+    """
+
+    def __init__(self, seconds=_CHUNK_SECONDS):
+        self._chunk_size = int(SAMPLE_RATE * seconds)
+        self._chunks = [np.empty((self._chunk_size, CHANNELS), dtype=np.int16)]
+        self._ends = [0]  # per chunk: samples filled
+        self._offsets = [0]  # per chunk: position of its first sample in the recording
+        self._scratch = np.empty(_SCRATCH_SAMPLES * CHANNELS, dtype=np.int64)
+        self._len = 0
+        self._sumsq = 0
+        self.peak = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def rms(self) -> float:
+        return math.sqrt(self._sumsq / (self._len * CHANNELS)) if self._len else 0.0
+
+    def write(self, block) -> int:
+        """Append a block of samples; returns the block's peak."""
+        n = len(block)
+        if not n:
+            return 0  # e.g. the pre-roll of a just-(re)opened warm stream
+        data, fill = self._chunks[-1], self._ends[-1]
+        if fill + n > len(data):
+            data, fill = np.empty((max(n, self._chunk_size), CHANNELS), dtype=np.int16), 0
+            self._chunks.append(data)
+            self._ends.append(0)
+            self._offsets.append(self._len)
+        chunk = data[fill:fill + n]
+        chunk[:] = block
+        # max/min instead of abs(): abs(-32768) overflows int16
+        peak = max(int(chunk.max()), -int(chunk.min()))
+        flat = chunk.reshape(-1)
+        for i in range(0, len(flat), len(self._scratch)):
+            part = flat[i:i + len(self._scratch)]
+            squares = self._scratch[:len(part)]
+            squares[:] = part
+            self._sumsq += int(np.dot(squares, squares))
+        if peak > self.peak:
+            self.peak = peak
+        self._ends[-1] = fill + n
+        self._len += n  # publish only once the samples are in place
+        return peak
+
+    def last(self, n: int) -> np.ndarray:
+        """Zero-copy view of the last block written (`n` samples)."""
+        end = self._ends[-1]
+        return self._chunks[-1][end - n:end]
+
+    def view(self, start=0, end=None) -> np.ndarray:
+        """The captured samples from `start` to `end`: zero-copy unless they span chunks."""
+        end = self._len if end is None else end
+        pieces = []
+        for data, offset, fill in zip(self._chunks, self._offsets, self._ends):
+            lo, hi = max(start, offset), min(end, offset + fill)
+            if lo < hi:
+                pieces.append(data[lo - offset:hi - offset])
+        if len(pieces) == 1:
+            return pieces[0]
+        if not pieces:
+            return self._chunks[0][:0]
+        return np.concatenate(pieces)
+
+
+# Warm-stream mode: how far back a hotkey press reaches into audio captured
+# before it, so a first syllable spoken with the press isn't clipped.
+_PREROLL_SECONDS = 0.3
+
+
+class _PreRoll:
+    """Circular buffer holding the last _PREROLL_SECONDS of warm-stream audio."""
+
+    def __init__(self, seconds=_PREROLL_SECONDS):
+        self._data = np.zeros((int(SAMPLE_RATE * seconds), CHANNELS), dtype=np.int16)
+        self._pos = 0
+        self._filled = 0
+
+    def write(self, block):
+        size = len(self._data)
+        block = block[-size:]
+        n = len(block)
+        first = min(n, size - self._pos)
+        self._data[self._pos:self._pos + first] = block[:first]
+        self._data[:n - first] = block[first:]
+        self._pos = (self._pos + n) % size
+        self._filled = min(size, self._filled + n)
+
+    def snapshot(self) -> np.ndarray:
+        """The buffered samples, oldest first."""
+        start = (self._pos - self._filled) % len(self._data)
+        return np.roll(self._data, -start, axis=0)[:self._filled]
+
+
+class _Capture:
+    """Audio captured by one push-to-talk recording.
+
+    Each stream callback is bound to its own _Capture. A previous stream whose
+    teardown hung can keep firing its callback; it holds a reference to its own
+    (inactive) capture, so it can never write into a newer recording.
+    """
+
+    def __init__(self, on_segment=None, encoder=None):
+        self.buffer = _BlockBuffer()
+        self.active = True
+        self.on_segment = on_segment  # callback(audio, encoded) for each finished segment; audio() gives its samples
+        self.encoder = encoder
+        self.encoded = False  # set by the encoder once the final payload is cut
+        self.segments = 0
+        self.seg_start = 0  # sample offset where the current segment begins
+        self._tail_peak = 0  # loudest block since the last cut
+        self._pause_samples = 0
+
+    def write(self, indata):
+        if not self.active:
+            return
+        peak = self.buffer.write(indata)
+        if self.encoder is not None:
+            self.encoder.write(self, self.buffer.last(len(indata)))
+        if self.on_segment is not None:
+            self._track_pauses(peak, len(indata))
+
+    def _track_pauses(self, peak: int, n: int):
+        """Cut a segment at the first long-enough pause (runs on the audio thread)."""
+        loudest = self.buffer.peak
+        self._tail_peak = max(self._tail_peak, peak)
+        if loudest >= _SILENCE_THRESHOLD and peak < loudest * _PAUSE_RATIO:
+            self._pause_samples += n
+        else:
+            self._pause_samples = 0
+
+        end = len(self.buffer)
+        if (end - self.seg_start >= SAMPLE_RATE * _SEGMENT_MIN_SECONDS
+                and self._pause_samples >= SAMPLE_RATE * _SEGMENT_PAUSE_SECONDS):
+            segment = functools.partial(self.buffer.view, self.seg_start, end)
+            self.seg_start = end
+            self._tail_peak = 0
+            self._pause_samples = 0
+            self.segments += 1
+            encoded = self.encoder.cut(self) if self.encoder is not None else None
+            self.on_segment(segment, encoded)
+
+    def finish_encoding(self):
+        """Close the streamed payload for the audio since the last cut (or None)."""
+        return self.encoder.cut(self, final=True) if self.encoder is not None else None
+
+    def tail_has_speech(self) -> bool:
+        """Whether anything after the last segment cut is louder than a pause."""
+        return (len(self.buffer) > self.seg_start
+                and self._tail_peak >= self.buffer.peak * _PAUSE_RATIO)
+
+
+class _Teardowns:
+    """Stops and closes PortAudio streams on one long-lived worker thread.
+
+    A second long-lived thread watches each teardown and calls its hang
+    callback if it hasn't finished within _STOP_TIMEOUT — instead of two new
+    threads per recording.
+    """
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+        self._watches = queue.Queue()
+        threading.Thread(target=self._work, daemon=True, name="voza-teardown").start()
+        threading.Thread(target=self._watch, daemon=True, name="voza-teardown-watch").start()
+
+    def submit(self, stream) -> threading.Event:
+        """Queue `stream` for teardown; the returned Event is set when it's done."""
+        done = threading.Event()
+        self._jobs.put((stream, done))
+        return done
+
+    def watch(self, done: threading.Event, on_hang):
+        self._watches.put((done, on_hang))
+
+    def _work(self):
+        while True:
+            stream, done = self._jobs.get()
+            _safe_teardown(stream)
+            done.set()
+
+    def _watch(self):
+        while True:
+            done, on_hang = self._watches.get()
+            if not done.wait(timeout=_STOP_TIMEOUT):
+                on_hang()
+
+
+def _safe_teardown(stream):
+    """Stop+close a PortAudio stream, swallowing errors (best-effort)."""
+    try:
+        stream.stop()
+    except Exception:
+        pass
+    try:
+        stream.close()
+    except Exception:
+        pass
+
+
+_teardowns = _Teardowns()
+
 
 class Recorder:
     def __init__(self):
-        self._frames = []
-        self._active = [False]
+        self._capture = _Capture()
         self._recording = False
         self._stream = None
         self._lock = threading.Lock()
+        # Warm-stream mode: one long-lived input stream feeding a pre-roll
+        # buffer, plus the capture it currently writes into (None when idle).
+        self._warm_stream = None
+        self._warm_lock = threading.Lock()
+        self._preroll = _PreRoll()
+        self._live = None
         self._last_stop_reason = None
         self._last_duration = 0.0
+        self._last_segments = 0
+        self._last_level = (0, 0.0)
         self.on_hang = None  # optional callback(reason) if stream teardown deadlocks
+        # Optional callback(load) for segment upload. While recording, it is
+        # called on the audio thread for every segment cut at a pause and must
+        # not block; load() encodes the segment and returns its audio buffer.
+        self.on_segment = None
 
     @property
     def last_stop_reason(self):
@@ -45,6 +445,16 @@ class Recorder:
         """Seconds of audio captured by the last successful stop()."""
         return self._last_duration
 
+    @property
+    def last_level(self):
+        """(peak, rms) of the last recording, tracked as blocks arrived."""
+        return self._last_level
+
+    @property
+    def last_segments(self):
+        """Segments handed to on_segment during the last recording."""
+        return self._last_segments
+
     @property
     def is_recording(self):
         return self._recording
@@ -53,98 +463,204 @@ class Recorder:
         with self._lock:
             if self._recording:
                 return
-            # Bind this recording's frame list and active flag into the stream
-            # callback via a closure. A previous stream whose teardown hung can
-            # keep firing its callback; it holds references to its own (dead)
-            # list and flag, so it can never write into a newer recording.
-            frames = []
-            active = [True]
-
-            def _callback(indata, nframes, time_info, status):
-                if active[0]:
-                    frames.append(indata.copy())
-
-            self._frames = frames
-            self._active = active
+            on_segment = self.on_segment
+            if on_segment is not None:
+                def emit(audio, encoded):
+                    on_segment(lambda: self._collect(audio(), encoded))
+            else:
+                emit = None
+
+            if _encoder is not None:
+                _encoder.start()
+            capture = _Capture(on_segment=emit, encoder=_encoder)
+            self._capture = capture
             self._recording = True
-            self._stream = sd.InputStream(
-                samplerate=SAMPLE_RATE,
-                channels=CHANNELS,
-                dtype="int16",
-                device=AUDIO_DEVICE,
-                callback=_callback,
-            )
-            self._stream.start()
+            try:
+                self._open_capture(capture)
+            except Exception:
+                # Not recording after all: the next press starts from scratch
+                capture.active = False
+                self._recording = False
+                stream, self._stream = self._stream, None
+                if stream is not None:
+                    self._teardown(stream)
+                raise
 
-    def _safe_teardown(self, stream):
-        """Stop+close a PortAudio stream, swallowing errors (best-effort)."""
-        try:
-            stream.stop()
-        except Exception:
-            pass
-        try:
-            stream.close()
-        except Exception:
-            pass
+    def _open_capture(self, capture):
+        """Start feeding `capture` from the warm stream or a new one (call under _lock)."""
+        if WARM_STREAM:
+            self._start_warm(capture)
+            return
 
-    def _watch_teardown(self, teardown):
-        """If teardown hasn't finished within _STOP_TIMEOUT, treat it as a hang."""
-        teardown.join(timeout=_STOP_TIMEOUT)
-        if teardown.is_alive():
-            reason = ("Audio device deadlocked (CoreAudio hang) — the mic is "
-                      "stuck open until the process exits.")
-            if self.on_hang is not None:
-                self.on_hang(reason)
-            else:
-                print("Warning: " + reason + " Quit and restart Voza.")
+        def _callback(indata, nframes, time_info, status):
+            capture.write(indata)
+
+        self._stream = sd.InputStream(
+            samplerate=SAMPLE_RATE,
+            channels=CHANNELS,
+            dtype="int16",
+            device=config.AUDIO_DEVICE,
+            callback=_callback,
+        )
+        self._stream.start()
+
+    def open(self):
+        """Warm-stream mode: open the long-lived input stream ahead of the first press."""
+        if WARM_STREAM:
+            with self._lock:
+                self._ensure_warm()
+
+    def close(self):
+        """Tear down the warm stream at quit, waiting at most _STOP_TIMEOUT."""
+        with self._lock:
+            stream, self._warm_stream = self._warm_stream, None
+        if stream is not None:
+            _teardowns.submit(stream).wait(timeout=_STOP_TIMEOUT)
+
+    def _ensure_warm(self):
+        """Open the warm stream, reopening it if the device went away (call under _lock)."""
+        stream = self._warm_stream
+        if stream is not None and stream.active:
+            return
+        if stream is not None:
+            print("  Input stream stopped (device change?) — reopening.")
+            self._teardown(stream)
+        self._preroll = _PreRoll()
+        self._warm_stream = sd.InputStream(
+            samplerate=SAMPLE_RATE,
+            channels=CHANNELS,
+            dtype="int16",
+            device=config.AUDIO_DEVICE,
+            callback=self._warm_callback,
+        )
+        self._warm_stream.start()
+
+    def _warm_callback(self, indata, nframes, time_info, status):
+        with self._warm_lock:
+            self._preroll.write(indata)
+            if self._live is not None:
+                self._live.write(indata)
+
+    def _start_warm(self, capture):
+        """Start recording on the warm stream, seeded with the pre-roll."""
+        self._ensure_warm()
+        with self._warm_lock:
+            preroll = self._preroll.snapshot()
+            if len(preroll):  # empty right after the stream was (re)opened
+                capture.write(preroll)
+            self._live = capture
+
+    def _teardown(self, stream):
+        """Stop+close a stream off the calling thread, watching for a deadlock.
+
+        Pa_StopStream can deadlock inside CoreAudio's HALB_Mutex (often after
+        sleep/wake), pinning the mic open until the process exits. If that
+        happens the watchdog calls on_hang (e.g. to auto-restart the app).
+        """
+        _teardowns.watch(_teardowns.submit(stream), self._on_teardown_hang)
+
+    def _on_teardown_hang(self):
+        reason = ("Audio device deadlocked (CoreAudio hang) — the mic is "
+                  "stuck open until the process exits.")
+        if self.on_hang is not None:
+            self.on_hang(reason)
+        else:
+            print("Warning: " + reason + " Quit and restart Voza.")
 
     def stop(self):
-        """Stop recording and return an in-memory audio buffer, or None if too short."""
+        """Stop recording and return an in-memory audio buffer, or None if too short.
+
+        When segments were handed to on_segment during the recording, only the
+        audio after the last cut is returned — None if that tail holds no speech.
+        """
         with self._lock:
             if not self._recording:
                 return None
             self._recording = False
-            self._active[0] = False  # stop the callback appending to `frames`
+            capture = self._capture
+            if WARM_STREAM:
+                with self._warm_lock:
+                    self._live = None
+            capture.active = False  # stop the callback appending frames
+            encoded = capture.finish_encoding()
             stream = self._stream
             self._stream = None
-            frames = self._frames
-            self._frames = []
-
-        # Tear down the input stream off the hotkey-listener thread so the
-        # pipeline stays snappy. A watchdog verifies teardown actually finished:
-        # Pa_StopStream can deadlock inside CoreAudio's HALB_Mutex (often after
-        # sleep/wake), pinning the mic open until the process exits. If that
-        # happens the watchdog calls on_hang (e.g. to auto-restart the app).
+
+        # Tear down a per-recording input stream off the hotkey-listener thread
+        # so the pipeline stays snappy. The warm stream stays open.
         if stream is not None:
-            teardown = threading.Thread(
-                target=self._safe_teardown, args=(stream,), daemon=True
-            )
-            teardown.start()
-            threading.Thread(
-                target=self._watch_teardown, args=(teardown,), daemon=True
-            ).start()
+            self._teardown(stream)
 
-        if not frames:
+        buffer = capture.buffer
+        self._last_segments = capture.segments
+        self._last_level = (buffer.peak, buffer.rms)
+        if not len(buffer):
             self._last_stop_reason = "short"
             return None
 
-        audio = np.concatenate(frames, axis=0)
-
         # Check if audio is essentially silent (dead/wrong mic)
-        peak = int(np.max(np.abs(audio)))
-        if peak < _SILENCE_THRESHOLD:
+        if buffer.peak < _SILENCE_THRESHOLD:
             self._last_stop_reason = "silent"
             return None
 
         # If less than 0.3 seconds of audio, treat as accidental press
         min_samples = int(SAMPLE_RATE * 0.3)
-        if len(audio) < min_samples:
+        if len(buffer) < min_samples:
+            self._last_stop_reason = "short"
+            return None
+
+        self._last_duration = len(buffer) / SAMPLE_RATE
+        if capture.segments and not capture.tail_has_speech():
             self._last_stop_reason = "short"
             return None
 
         self._last_stop_reason = None
-        self._last_duration = len(audio) / SAMPLE_RATE
-        return self._to_audio_buffer(audio)
+        tracing.mark("buffer_ready")
+        audio_buffer = self._collect(buffer.view(capture.seg_start), encoded)
+        tracing.mark("encode_done")
+        return audio_buffer
+
+    def _collect(self, audio: np.ndarray, encoded=None) -> io.BytesIO:
+        """Return the streamed OGG payload for `audio`, or encode it one-shot.
+
+        With VAD trimming on, non-speech edges and long pauses are cut. The
+        streamed payload already starts at the speech; it is kept unless
+        trimming the rest would remove a large part of the recording. The
+        returned buffer carries `pcm_digest`, a hash of the samples it
+        encodes, so transcripts can be cached by audio content.
+        """
+        ogg_buf = None
+        if encoded is not None:
+            try:
+                ogg_buf = encoded.result(timeout=_ENCODE_TIMEOUT)
+            except FutureTimeout:
+                pass
+        if ogg_buf is None:
+            trimmed = vad.trim(audio) if VAD_TRIM else audio
+            self._log_trim(audio, trimmed)
+            return self._tag(self._to_audio_buffer(trimmed), trimmed)
+
+        keep = ogg_buf.keep
+        if keep is not None and vad.dropped(keep, ogg_buf.start) >= max(
+                SAMPLE_RATE * _REENCODE_MIN_SECONDS, len(audio) * _REENCODE_FRACTION):
+            trimmed = vad.apply(audio, keep)
+            self._log_trim(audio, trimmed)
+            return self._tag(self._to_audio_buffer(trimmed), trimmed)
+        streamed = audio[ogg_buf.start:]
+        self._log_trim(audio, streamed)
+        return self._tag(ogg_buf, streamed)
+
+    @staticmethod
+    def _log_trim(audio: np.ndarray, trimmed: np.ndarray):
+        if len(trimmed) < len(audio):
+            print(f"  [VAD] Trimmed {len(audio) / SAMPLE_RATE:.1f}s → "
+                  f"{len(trimmed) / SAMPLE_RATE:.1f}s")
+
+    @staticmethod
+    def _tag(buf: io.BytesIO, audio: np.ndarray) -> io.BytesIO:
+        """Attach the PCM content hash (encoder output isn't byte-stable; samples are)."""
+        buf.pcm_digest = hashlib.sha256(memoryview(np.ascontiguousarray(audio)).cast("B")).hexdigest()
+        return buf
 
     def _to_wav_bytes(self, audio: np.ndarray) -> io.BytesIO:
         """Convert raw audio to an in-memory WAV buffer."""
@@ -153,24 +669,21 @@ class Recorder:
             wf.setnchannels(CHANNELS)
             wf.setsampwidth(2)  # 16-bit = 2 bytes
             wf.setframerate(SAMPLE_RATE)
-            wf.writeframes(audio.tobytes())
+            wf.writeframes(memoryview(audio).cast("B"))
         buf.seek(0)
         buf.name = "recording.wav"
         return buf
 
-    def _to_ogg_bytes(self, wav_buf: io.BytesIO) -> io.BytesIO:
-        """Convert WAV buffer to OGG/Opus via ffmpeg for ~90% smaller upload."""
+    def _to_ogg_bytes(self, audio: np.ndarray):
+        """Encode raw PCM to OGG/Opus via ffmpeg for ~90% smaller upload.
+
+        Returns None if ffmpeg fails. The samples are piped straight from the
+        recording buffer — no intermediate WAV copy.
+        """
         try:
             result = subprocess.run(
-                [
-                    "ffmpeg", "-y",
-                    "-f", "wav", "-i", "pipe:0",
-                    "-c:a", "libopus",
-                    "-b:a", "24k",       # 24kbps is plenty for speech
-                    "-application", "voip",
-                    "-f", "ogg", "pipe:1",
-                ],
-                input=wav_buf.read(),
+                _FFMPEG_OPUS,
+                input=memoryview(audio).cast("B"),
                 capture_output=True,
                 timeout=5,
             )
@@ -180,14 +693,12 @@ class Recorder:
                 return ogg_buf
         except (subprocess.TimeoutExpired, Exception):
             pass
-
-        # Fallback: return the original WAV
-        wav_buf.seek(0)
-        return wav_buf
+        return None
 
     def _to_audio_buffer(self, audio: np.ndarray) -> io.BytesIO:
         """Return the best available in-memory audio buffer (OGG if ffmpeg exists, else WAV)."""
-        wav_buf = self._to_wav_bytes(audio)
         if _HAS_FFMPEG:
-            return self._to_ogg_bytes(wav_buf)
-        return wav_buf
+            ogg_buf = self._to_ogg_bytes(audio)
+            if ogg_buf is not None:
+                return ogg_buf
+        return self._to_wav_bytes(audio)
@@ -9,7 +9,7 @@ echo "Press Ctrl+C to stop."
 echo
 
 while true; do
-    uv run main.py
+    uv run main.py "$@"
     EXIT_CODE=$?
 
     if [ $EXIT_CODE -eq 0 ]; then
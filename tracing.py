@@ -0,0 +1,184 @@
+"""Per-dictation latency traces (VOZA_TRACE).
+
+A trace starts at hotkey down and collects monotonic timestamps (seconds
+since hotkey down) for each pipeline step, plus a few fields (audio length,
+bytes uploaded, backends). The current trace lives in a context variable, so
+code anywhere in the pipeline calls mark()/field() without passing it around;
+asyncio tasks and core stages inherit it, and wrap() carries it into other
+worker pools. Finished traces are appended to ~/.voza/traces.jsonl (rotated
+at _MAX_BYTES); `main.py --trace-summary` reports p50/p95 per stage.
+
+Marks, in pipeline order:
+  hotkey_down, hotkey_up, buffer_ready, encode_done, transcribe_request,
+  transcribe_response, cleanup_first_token, cleanup_done, first_keystroke,
+  last_keystroke
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+
+from config import TRACE, TRACE_FILE
+
+_MAX_BYTES = 5 * 1024 * 1024  # then traces.jsonl moves to traces.jsonl.1
+
+_current = contextvars.ContextVar("voza_trace", default=None)
+_write_lock = threading.Lock()
+
+
+class Trace:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.wall_time = time.time()
+        self._start = time.monotonic()
+        self.marks = {"hotkey_down": 0.0}
+        self.fields = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name: str, last: bool = False):
+        """Timestamp `name` — its first occurrence, or with last=True its latest."""
+        with self._lock:
+            if last or name not in self.marks:
+                self.marks[name] = round(time.monotonic() - self._start, 4)
+
+    def set(self, name: str, value, first: bool = False):
+        with self._lock:
+            if not first or name not in self.fields:
+                self.fields[name] = value
+
+    def add(self, name: str, amount):
+        with self._lock:
+            self.fields[name] = self.fields.get(name, 0) + amount
+
+
+def begin():
+    """Start a trace at hotkey down and make it current; None with tracing off."""
+    if not TRACE:
+        return None
+    trace = Trace()
+    _current.set(trace)
+    return trace
+
+
+def activate(trace):
+    """Make `trace` current in this context (e.g. a dictation's task)."""
+    _current.set(trace)
+
+
+def current():
+    return _current.get()
+
+
+def mark(name: str, last: bool = False):
+    trace = _current.get()
+    if trace is not None:
+        trace.mark(name, last)
+
+
+def field(name: str, value, first: bool = False):
+    """Record a field (e.g. a backend) on the current trace; first=True keeps an earlier value."""
+    trace = _current.get()
+    if trace is not None:
+        trace.set(name, value, first)
+
+
+def add(name: str, amount):
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, amount)
+
+
+def wrap(fn, trace=None):
+    """fn, bound to `trace` (default: the current one) — for work handed to another thread."""
+    if trace is None:
+        trace = _current.get()
+    if trace is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+def finish(trace):
+    """Append a finished trace to the trace file."""
+    if trace is None:
+        return
+    with trace._lock:
+        record = {"id": trace.id, "time": round(trace.wall_time, 3),
+                  "marks": dict(trace.marks), **trace.fields}
+    line = json.dumps(record, ensure_ascii=False) + "\n"
+    with _write_lock:
+        try:
+            os.makedirs(os.path.dirname(TRACE_FILE), exist_ok=True)
+            if os.path.exists(TRACE_FILE) and os.path.getsize(TRACE_FILE) + len(line) > _MAX_BYTES:
+                os.replace(TRACE_FILE, TRACE_FILE + ".1")
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"  [Trace] Could not write {TRACE_FILE}: {e}")
+
+
+# Stages reported by summary(): (name, from mark, to mark)
+_STAGES = [
+    ("stop (release → audio)", "hotkey_up", "buffer_ready"),
+    ("encode", "buffer_ready", "encode_done"),
+    ("transcription", "transcribe_request", "transcribe_response"),
+    ("cleanup first token", "transcribe_response", "cleanup_first_token"),
+    ("cleanup total", "transcribe_response", "cleanup_done"),
+    ("typing", "first_keystroke", "last_keystroke"),
+    ("release → first text", "hotkey_up", "first_keystroke"),
+    ("release → done", "hotkey_up", "last_keystroke"),
+]
+
+
+def _load(path: str) -> list:
+    records = []
+    for name in (path + ".1", path):
+        try:
+            with open(name, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        pass  # a line cut short by a crash
+        except OSError:
+            pass
+    return records
+
+
+def _percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of sorted `values`."""
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def summary(path: str = TRACE_FILE) -> str:
+    """p50/p95 per stage across every trace on disk, as a printable table."""
+    records = _load(path)
+    if not records:
+        return f"No traces in {path} (set VOZA_TRACE=true to record them)."
+    lines = [f"{len(records)} dictations traced ({path})", "",
+             f"  {'stage':<24} {'n':>5} {'p50':>8} {'p95':>8}"]
+    for name, start, end in _STAGES:
+        values = sorted(r["marks"][end] - r["marks"][start] for r in records
+                        if start in r.get("marks", {}) and end in r.get("marks", {}))
+        if values:
+            lines.append(f"  {name:<24} {len(values):>5} {_percentile(values, 50):>7.2f}s "
+                         f"{_percentile(values, 95):>7.2f}s")
+    for field in ("transcribe_backend", "cleanup_backend"):
+        counts = {}
+        for r in records:
+            if field in r:
+                counts[r[field]] = counts.get(r[field], 0) + 1
+        if counts:
+            lines.append("")
+            lines.append(f"  {field}: " + ", ".join(f"{k} ×{v}" for k, v in sorted(counts.items())))
+    return "\n".join(lines)
@@ -1,14 +1,80 @@
+import hashlib
+import io
+import os
+import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from api_client import client, fallback_client
-from config import VOZA_MODE, WHISPER_MODEL, WHISPER_SERVER_URL
+import health
+import hedge
+import tracing
+from api_client import client, fallback_client, http
+from cache import LRUCache
+from config import (
+    VOZA_MODE, WHISPER_MODEL, WHISPER_SERVER_URL, HEDGE_TRANSCRIBE_AFTER,
+    TRANSCRIPT_CACHE_DISK, CACHE_DIR, STREAM_TRANSCRIBE, STREAM_TRANSCRIBE_MODEL,
+)
+
+# OpenAI mode with streaming transcription on: the cloud model that can stream
+# text deltas (whisper-1 can't) serves every request, so text and cache agree.
+STREAMS = VOZA_MODE == "openai" and STREAM_TRANSCRIBE
+_OPENAI_MODEL = STREAM_TRANSCRIBE_MODEL if STREAMS else WHISPER_MODEL
+
+# Transcripts by audio content + backend. Transcripts are small, so a few MB
+# in memory covers thousands of dictations.
+_cache = LRUCache(
+    "transcripts",
+    max_bytes=4 * 1024 * 1024,
+    disk_dir=os.path.join(CACHE_DIR, "transcripts") if TRANSCRIPT_CACHE_DISK else None,
+    max_disk_bytes=20 * 1024 * 1024,
+)
+_BACKEND = f"whisper-server:{WHISPER_SERVER_URL}" if VOZA_MODE == "local" else f"openai:{_OPENAI_MODEL}"
 
 
 def transcribe(audio_buffer) -> str:
-    """Transcribe audio and return raw text. Routes to OpenAI or whisper-server."""
+    """Transcribe audio and return raw text. Routes to OpenAI or whisper-server.
+
+    Results are cached by audio content, so identical audio is only sent once.
+    """
+    tracing.mark("transcribe_request")
+    key = _cache_key(audio_buffer)
+    text = _cache.get(key)
+    if text is not None:
+        print(f"  [Cache] Transcript hit ({_cache.stats()})")
+        tracing.field("transcribe_backend", "cache", first=True)
+    else:
+        tracing.add("upload_bytes", audio_buffer.getbuffer().nbytes)
+        text = _transcribe(audio_buffer)
+        _cache.put(key, text)
+    tracing.mark("transcribe_response", last=True)
+    return text
+
+
+def _cache_key(audio_buffer) -> str:
+    """Hash of the PCM samples (set by the recorder) or else of the encoded bytes, plus backend."""
+    digest = getattr(audio_buffer, "pcm_digest", None)
+    if digest is None:
+        with audio_buffer.getbuffer() as view:
+            digest = hashlib.sha256(view).hexdigest()
+    # A fallback answer is cached under the configured backend: it answers the
+    # same request, and a re-run would take the same route anyway.
+    return hashlib.sha256(f"{_BACKEND}\0{digest}".encode()).hexdigest()
+
+
+def _transcribe(audio_buffer) -> str:
     if VOZA_MODE == "local":
+        if fallback_client is not None and not health.whisper.allow():
+            print("  whisper-server circuit open, using OpenAI")
+            return _transcribe_openai(audio_buffer, fallback_client)
+        if fallback_client is not None and HEDGE_TRANSCRIBE_AFTER > 0:
+            return hedge.race(
+                "Whisper",
+                lambda token: _local(_copy(audio_buffer), token),
+                lambda token: _transcribe_openai(_copy(audio_buffer), fallback_client, token),
+                HEDGE_TRANSCRIBE_AFTER,
+            )
         try:
-            return _transcribe_local(audio_buffer)
+            return _local(audio_buffer)
         except Exception as e:
             if fallback_client is None:
                 raise
@@ -17,16 +83,154 @@ def transcribe(audio_buffer) -> str:
     return _transcribe_openai(audio_buffer, client)
 
 
-def _transcribe_openai(audio_buffer, api) -> str:
+# Segment uploads share one small pool: segments of a recording are submitted
+# in order, and a second worker keeps one slow request from delaying the next.
+_SEGMENT_WORKERS = 2
+_segment_pool = ThreadPoolExecutor(max_workers=_SEGMENT_WORKERS, thread_name_prefix="voza-segment")
+
+
+class SegmentedTranscription:
+    """Transcribes one recording piecewise while it is still being captured.
+
+    submit() is wired to Recorder.on_segment and returns immediately; the
+    segment is encoded and transcribed on a background worker. finish()
+    transcribes the final tail and returns the stitched transcript in
+    recording order.
+    """
+
+    def __init__(self):
+        self._futures = []
+        self._trace = tracing.current()  # segments are submitted from the audio thread
+
+    @property
+    def pending(self) -> bool:
+        """Whether any segment was submitted before release."""
+        return bool(self._futures)
+
+    def submit(self, load):
+        self._futures.append(_segment_pool.submit(
+            tracing.wrap(lambda: transcribe(load()).strip(), self._trace)))
+
+    def finish(self, tail_buffer=None) -> str:
+        """Wait for every segment (plus the tail, if given) and join their text."""
+        return "".join(self.stream(tail_buffer))
+
+    def stream(self, tail_buffer=None):
+        """Yield each segment's text (space-separated) in order as it is transcribed."""
+        futures = list(self._futures)
+        if tail_buffer is not None:
+            futures.append(_segment_pool.submit(tracing.wrap(lambda: transcribe(tail_buffer).strip())))
+        sep = ""
+        try:
+            for f in futures:
+                text = f.result()
+                if text:
+                    yield sep + text
+                    sep = " "
+        except Exception:
+            self.cancel()
+            raise
+
+    def cancel(self):
+        """Drop segments that haven't started uploading yet."""
+        for f in self._futures:
+            f.cancel()
+
+
+def transcribe_stream(audio_buffer):
+    """Yield the transcript of `audio_buffer` as it is decoded.
+
+    With STREAMS, these are OpenAI's text deltas (append-only — text already
+    yielded is never revised); otherwise the whole transcript comes at once.
+    Cached like transcribe(). Falls back to one blocking request if the
+    stream fails before producing text.
+    """
+    if not STREAMS:
+        yield transcribe(audio_buffer)
+        return
+    tracing.mark("transcribe_request")
+    key = _cache_key(audio_buffer)
+    text = _cache.get(key)
+    if text is not None:
+        print(f"  [Cache] Transcript hit ({_cache.stats()})")
+        tracing.field("transcribe_backend", "cache", first=True)
+        tracing.mark("transcribe_response", last=True)
+        yield text
+        return
+    tracing.add("upload_bytes", audio_buffer.getbuffer().nbytes)
+    tracing.field("transcribe_backend", f"openai:{_OPENAI_MODEL} (streamed)", first=True)
+    parts = []
+    try:
+        audio_buffer.seek(0)
+        stream = client.audio.transcriptions.create(
+            model=_OPENAI_MODEL,
+            file=audio_buffer,
+            stream=True,
+        )
+        try:
+            for event in stream:
+                if event.type == "transcript.text.delta" and event.delta:
+                    parts.append(event.delta)
+                    yield event.delta
+        finally:
+            stream.close()
+    except Exception as e:
+        if parts:
+            raise
+        print(f"  Whisper streaming error, retrying without streaming: {e}")
+        text = _transcribe_openai(audio_buffer, client)
+        _cache.put(key, text)
+        tracing.mark("transcribe_response", last=True)
+        yield text
+        return
+    tracing.mark("transcribe_response", last=True)
+    _cache.put(key, "".join(parts))
+
+
+# A sentence is final once its terminator is followed by whitespace — the
+# next sentence has begun.
+_SENTENCE_BREAK = re.compile(r"[.!?…]+[\"')\]]*\s+")
+
+
+def sentences(deltas):
+    """Regroup append-only transcript text into finished sentences.
+
+    Only text that can no longer change is yielded (stable prefix): a
+    sentence comes out once the text after it has started, and whatever is
+    left when `deltas` ends comes out last. Nothing yielded is ever revised.
+    """
+    pending = ""
+    for delta in deltas:
+        pending += delta
+        start = 0
+        for m in _SENTENCE_BREAK.finditer(pending):
+            sentence = pending[start:m.end()].strip()
+            if sentence:
+                yield sentence
+            start = m.end()
+        pending = pending[start:]
+    if pending.strip():
+        yield pending.strip()
+
+
+def _copy(audio_buffer) -> io.BytesIO:
+    """Independent copy of an audio buffer, so hedged requests don't share a file position."""
+    buf = io.BytesIO(audio_buffer.getvalue())
+    buf.name = getattr(audio_buffer, "name", "audio.wav")
+    return buf
+
+
+def _transcribe_openai(audio_buffer, api, cancel=None) -> str:
     """Send audio buffer to OpenAI Whisper API with one retry."""
     last_error = None
     for attempt in range(2):
+        if attempt and cancel is not None and cancel.is_set():
+            break
         try:
             audio_buffer.seek(0)
-            response = api.audio.transcriptions.create(
-                model=WHISPER_MODEL,
-                file=audio_buffer,
-            )
+            model = _OPENAI_MODEL if api is client else WHISPER_MODEL
+            response = api.audio.transcriptions.create(model=model, file=audio_buffer)
+            tracing.field("transcribe_backend", f"openai:{model}", first=True)
             return response.text
         except Exception as e:
             last_error = e
@@ -37,19 +241,32 @@ def _transcribe_openai(audio_buffer, api) -> str:
     raise last_error
 
 
-def _transcribe_local(audio_buffer) -> str:
-    """Send audio to whisper-server HTTP API."""
-    import requests
+def _local(audio_buffer, cancel=None) -> str:
+    """whisper-server transcription that keeps the circuit breaker up to date."""
+    try:
+        text = _transcribe_local(audio_buffer, cancel)
+    except Exception as e:
+        if cancel is None or not cancel.is_set():  # a cancelled hedge loser isn't an outage
+            health.whisper.record_failure(e)
+        raise
+    health.whisper.record_success()
+    tracing.field("transcribe_backend", "whisper-server", first=True)
+    return text
 
+
+def _transcribe_local(audio_buffer, cancel=None) -> str:
+    """Send audio to whisper-server HTTP API."""
     audio_buffer.seek(0)
     name = getattr(audio_buffer, "name", "audio.wav")
     mime = "audio/ogg" if name.endswith(".ogg") else "audio/wav"
 
     last_error = None
     for attempt in range(2):
+        if attempt and cancel is not None and cancel.is_set():
+            break
         try:
             audio_buffer.seek(0)
-            resp = requests.post(
+            resp = http.post(
                 f"{WHISPER_SERVER_URL}/inference",
                 files={"file": (name, audio_buffer, mime)},
                 data={"response_format": "json"},
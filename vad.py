@@ -0,0 +1,150 @@
+"""Energy/zero-crossing voice activity detection for trimming recordings.
+
+Vectorized over 20 ms frames: drops leading/trailing non-speech and collapses
+long interior pauses, so less silence is uploaded and decoded — and Whisper
+has less silence to hallucinate from. trim() handles a whole recording at
+once; Tracker gathers the same statistics block by block during capture, so
+the streaming encoder can skip the leading silence as it happens.
+"""
+
+import numpy as np
+
+from config import SAMPLE_RATE
+
+_FRAME = SAMPLE_RATE * 20 // 1000  # samples per 20 ms analysis frame
+
+# A frame is speech when its RMS clears the noise floor (10th-percentile frame
+# energy) by this factor. Capped at a fraction of the loudest frame so a
+# recording that is speech throughout doesn't set its "noise floor" too high.
+_NOISE_FACTOR = 3.0
+_MAX_FLOOR_RATIO = 0.1
+# Absolute floor: a quiet room reads peaks of ~17-52, i.e. RMS well under this.
+_MIN_RMS = 30.0
+
+# Fricatives ("s", "f", "th") are quiet but noisy: count a frame at half the
+# energy threshold as speech when at least this fraction of its samples cross zero.
+_FRICATIVE_ZCR = 0.3
+
+# Audio kept around each speech region, and how much of a longer interior
+# pause is kept on top of that padding.
+_PAD_SECONDS = 0.2
+_MAX_PAUSE_SECONDS = 0.4
+_PAD_FRAMES = int(_PAD_SECONDS * SAMPLE_RATE) // _FRAME
+
+
+def speech_frames(audio: np.ndarray) -> np.ndarray:
+    """Boolean speech flag per 20 ms frame of `audio` (int16, any channel count)."""
+    return _classify(*_frame_stats(_mono(audio)))
+
+
+def trim(audio: np.ndarray) -> np.ndarray:
+    """Return `audio` without non-speech edges and with long pauses shortened.
+
+    Returns `audio` itself (no copy) when nothing would be removed or no
+    speech is detected at all — the caller's silence checks handle that case.
+    """
+    voiced = speech_frames(audio)
+    if not voiced.any():
+        return audio
+    return apply(audio, keep_frames(voiced))
+
+
+def keep_frames(voiced: np.ndarray) -> np.ndarray:
+    """Which frames trim() keeps, given their speech flags (at least one set)."""
+    # Pad speech regions on both sides (binary dilation by `pad` frames)
+    pad = _PAD_FRAMES
+    kernel = np.ones(2 * pad + 1, dtype=np.int32)
+    keep = np.convolve(voiced.astype(np.int32), kernel, mode="same") > 0
+
+    # Collapse interior gaps longer than the max pause: keep half of the max
+    # pause on each side of the gap, drop the middle.
+    max_gap = int(_MAX_PAUSE_SECONDS * SAMPLE_RATE) // _FRAME
+    edges = np.diff(np.concatenate(([1], keep.astype(np.int8), [1])))
+    gap_starts = np.flatnonzero(edges == -1)
+    gap_ends = np.flatnonzero(edges == 1)
+    last = len(keep)
+    for start, end in zip(gap_starts, gap_ends):
+        if start == 0 or end == last:
+            continue  # leading/trailing silence: drop all of it
+        if end - start > max_gap:
+            keep[start:start + max_gap // 2] = True
+            keep[end - max_gap // 2:end] = True
+    return keep
+
+
+def apply(audio: np.ndarray, keep: np.ndarray) -> np.ndarray:
+    """The samples of `audio` in kept frames (`audio` itself if that's all of them)."""
+    # Samples past the last whole frame follow the last frame's verdict
+    mask = np.repeat(keep, _FRAME)[:len(audio)]
+    mask = np.concatenate((mask, np.full(len(audio) - len(mask), keep[-1])))
+    if mask.all():
+        return audio
+    return audio[mask]
+
+
+def dropped(keep: np.ndarray, start: int = 0) -> int:
+    """Roughly how many samples from `start` on the frame mask `keep` drops."""
+    return int(np.count_nonzero(~keep[start // _FRAME:])) * _FRAME
+
+
+class Tracker:
+    """Per-frame statistics gathered block by block while a recording is captured.
+
+    add() only analyzes the frames each block completes, so by the time the
+    recording ends the speech decision needs no pass over the samples; and
+    onset() finds where speech starts while the rest is still being spoken,
+    so the leading silence can be left out of a streamed encode.
+    """
+
+    def __init__(self):
+        self._energy = []
+        self._zcr = []
+        self._rest = np.zeros(0, dtype=np.int16)  # samples short of a whole frame
+
+    def add(self, block: np.ndarray):
+        mono = np.concatenate((self._rest, _mono(block)))
+        n = len(mono) // _FRAME * _FRAME
+        self._rest = mono[n:]
+        if n:
+            energy, zcr = _frame_stats(mono[:n])
+            self._energy.append(energy)
+            self._zcr.append(zcr)
+
+    def voiced(self) -> np.ndarray:
+        """Speech flag per frame so far."""
+        if not self._energy:
+            return np.zeros(0, dtype=bool)
+        return _classify(np.concatenate(self._energy), np.concatenate(self._zcr))
+
+    def onset(self):
+        """Sample offset where kept audio starts (speech minus padding), or None before any speech."""
+        voiced = self.voiced()
+        if not voiced.any():
+            return None
+        return max(0, int(np.argmax(voiced)) - _PAD_FRAMES) * _FRAME
+
+    def keep(self):
+        """keep_frames() for everything added so far, or None if it held no speech."""
+        voiced = self.voiced()
+        return keep_frames(voiced) if voiced.any() else None
+
+
+def _mono(audio: np.ndarray) -> np.ndarray:
+    return audio.reshape(len(audio), -1)[:, 0]
+
+
+def _frame_stats(mono: np.ndarray):
+    """(RMS, zero-crossing rate) of each whole frame of `mono`."""
+    n = len(mono) // _FRAME
+    frames = mono[:n * _FRAME].reshape(n, _FRAME).astype(np.float32)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+    return energy, zcr
+
+
+def _classify(energy: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+    if len(energy) == 0:
+        return np.zeros(0, dtype=bool)
+    floor = min(np.percentile(energy, 10) * _NOISE_FACTOR, energy.max() * _MAX_FLOOR_RATIO)
+    threshold = max(floor, _MIN_RMS)
+    return (energy > threshold) | ((energy > threshold / 2) & (zcr > _FRICATIVE_ZCR))
@@ -0,0 +1,142 @@
+"""Long-lived uinput virtual keyboard (Linux): paste shortcut and direct typing.
+
+One device is created for the whole process, so a paste or a typed chunk is
+a handful of input events instead of a device setup (or a wtype/xdotool
+process) per call. uinput sends key codes, not characters: the compositor
+turns them into text with the active keyboard layout, so the keymap here
+must match it.
+
+Keymaps (VOZA_KEYMAP):
+  us       — US layout: printable ASCII, Enter, Tab
+  us-intl  — US International (xkb "us(intl)"): ASCII plus Spanish letters
+             and marks via AltGr (á é í ó ú ü ñ ¿ ¡, and ç €). Its dead keys
+             (' " ` ~ ^) are followed by a space to produce the plain mark.
+Anything else is reported as untypable, for the caller to type another way.
+"""
+
+import threading
+import time
+
+from evdev import UInput, ecodes as e
+
+# A new device needs a moment before the compositor routes its events.
+_REGISTER_DELAY = 0.1
+
+_SHIFT = e.KEY_LEFTSHIFT
+_ALTGR = e.KEY_RIGHTALT
+
+_US_PLAIN = {
+    " ": e.KEY_SPACE, "\n": e.KEY_ENTER, "\t": e.KEY_TAB,
+    "`": e.KEY_GRAVE, "-": e.KEY_MINUS, "=": e.KEY_EQUAL,
+    "[": e.KEY_LEFTBRACE, "]": e.KEY_RIGHTBRACE, "\\": e.KEY_BACKSLASH,
+    ";": e.KEY_SEMICOLON, "'": e.KEY_APOSTROPHE,
+    ",": e.KEY_COMMA, ".": e.KEY_DOT, "/": e.KEY_SLASH,
+}
+_US_SHIFTED = {
+    "~": e.KEY_GRAVE, "_": e.KEY_MINUS, "+": e.KEY_EQUAL,
+    "{": e.KEY_LEFTBRACE, "}": e.KEY_RIGHTBRACE, "|": e.KEY_BACKSLASH,
+    ":": e.KEY_SEMICOLON, '"': e.KEY_APOSTROPHE,
+    "<": e.KEY_COMMA, ">": e.KEY_DOT, "?": e.KEY_SLASH,
+    "!": e.KEY_1, "@": e.KEY_2, "#": e.KEY_3, "$": e.KEY_4, "%": e.KEY_5,
+    "^": e.KEY_6, "&": e.KEY_7, "*": e.KEY_8, "(": e.KEY_9, ")": e.KEY_0,
+}
+# us(intl) third level (AltGr); Shift+AltGr gives the capital
+_INTL_ALTGR = {
+    "á": e.KEY_A, "é": e.KEY_E, "í": e.KEY_I, "ó": e.KEY_O, "ú": e.KEY_U,
+    "ü": e.KEY_Y, "ñ": e.KEY_N, "ç": e.KEY_COMMA,
+    "¿": e.KEY_SLASH, "¡": e.KEY_1, "€": e.KEY_5,
+}
+_INTL_DEAD = {"'", '"', "`", "~", "^"}
+
+
+def _build_keymap(name: str) -> dict:
+    """char → (key, modifiers, dead) for keymap `name`."""
+    keymap = {}
+    for ch in "abcdefghijklmnopqrstuvwxyz":
+        key = getattr(e, f"KEY_{ch.upper()}")
+        keymap[ch] = (key, (), False)
+        keymap[ch.upper()] = (key, (_SHIFT,), False)
+    for ch in "0123456789":
+        keymap[ch] = (getattr(e, f"KEY_{ch}"), (), False)
+    for ch, key in _US_PLAIN.items():
+        keymap[ch] = (key, (), False)
+    for ch, key in _US_SHIFTED.items():
+        keymap[ch] = (key, (_SHIFT,), False)
+    if name == "us-intl":
+        for ch in _INTL_DEAD:
+            key, mods, _ = keymap[ch]
+            keymap[ch] = (key, mods, True)
+        for ch, key in _INTL_ALTGR.items():
+            keymap[ch] = (key, (_ALTGR,), False)
+            if ch.upper() != ch:
+                keymap[ch.upper()] = (key, (_SHIFT, _ALTGR), False)
+    return keymap
+
+
+class VirtualKeyboard:
+    """A uinput keyboard that types text through a fixed keymap."""
+
+    def __init__(self, keymap: str):
+        self._keymap = _build_keymap(keymap)
+        keys = {key for key, _, _ in self._keymap.values()}
+        keys |= {_SHIFT, _ALTGR, e.KEY_LEFTCTRL, e.KEY_V}
+        self._ui = UInput({e.EV_KEY: sorted(keys)}, name="voza-virtual-kbd")
+        self._lock = threading.Lock()
+        time.sleep(_REGISTER_DELAY)
+
+    def can_type(self, ch: str) -> bool:
+        return ch in self._keymap
+
+    def runs(self, text: str):
+        """Split `text` into (run, typable) pieces, in order."""
+        start = 0
+        for i in range(1, len(text) + 1):
+            if i == len(text) or self.can_type(text[i]) != self.can_type(text[start]):
+                yield text[start:i], self.can_type(text[start])
+                start = i
+
+    def type(self, text: str):
+        """Type `text`, which must be typable (see runs())."""
+        with self._lock:
+            for ch in text:
+                key, mods, dead = self._keymap[ch]
+                self._press(key, mods)
+                if dead:
+                    self._press(e.KEY_SPACE, ())  # dead key + space = the mark itself
+
+    def combo(self, *keys):
+        """Press `keys` together (e.g. KEY_LEFTCTRL, KEY_V) and release them."""
+        with self._lock:
+            self._press(keys[-1], keys[:-1])
+
+    def close(self):
+        self._ui.close()
+
+    def _press(self, key, mods):
+        ui = self._ui
+        for mod in mods:
+            ui.write(e.EV_KEY, mod, 1)
+        ui.write(e.EV_KEY, key, 1)
+        ui.syn()
+        ui.write(e.EV_KEY, key, 0)
+        for mod in reversed(mods):
+            ui.write(e.EV_KEY, mod, 0)
+        ui.syn()
+
+
+_keyboard = None
+_failed = False
+_create_lock = threading.Lock()
+
+
+def get(keymap: str):
+    """The process-wide virtual keyboard, created on first use; None if uinput is unavailable."""
+    global _keyboard, _failed
+    with _create_lock:
+        if _keyboard is None and not _failed:
+            try:
+                _keyboard = VirtualKeyboard(keymap)
+            except Exception as exc:
+                _failed = True
+                print(f"  Warning: uinput keyboard unavailable ({exc}); typing via wtype/xdotool")
+        return _keyboard
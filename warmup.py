@@ -0,0 +1,161 @@
+"""Keep the local models loaded (local mode).
+
+A tiny request goes to whisper-server and Ollama at startup, and again
+whenever dictation has been idle close to Ollama's unload window, so real
+dictations never pay for a cold model load. The Ollama warm-up loads
+LOCAL_CLEANUP_MODEL with its keep-alive and, with prefix reuse on, also
+evaluates the cleanup system prompt so the first dictation skips it. After
+_MAX_IDLE without a dictation the user is away: re-warming pauses until the
+next hotkey press.
+"""
+
+import io
+import math
+import re
+import threading
+import time
+import wave
+from concurrent.futures import wait
+
+import enhancer
+import health
+from api_client import http
+from config import (
+    SAMPLE_RATE, WHISPER_SERVER_URL, OLLAMA_BASE_URL, LOCAL_CLEANUP_MODEL, OLLAMA_KEEP_ALIVE,
+    PREFIX_REUSE,
+)
+
+# Ollama unloads an idle model after 5 minutes by default — and a request
+# through its OpenAI-compatible API resets the timer to that default, whatever
+# keep-alive the warm-up set. With prefix reuse every request goes through the
+# native API with OLLAMA_KEEP_ALIVE instead. Either way, re-warm a minute
+# before the unload.
+_DEFAULT_KEEP_ALIVE = 300.0
+_REWARM_MARGIN = 60.0
+# Stop re-warming after this long without a dictation, until the next one.
+_MAX_IDLE = 3600.0
+_WARMUP_TIMEOUT = 60.0  # a cold load of a large model takes a while
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d*)?|\.\d+)(ns|us|µs|ms|s|m|h)")
+_DURATION_UNITS = {"ns": 1e-9, "us": 1e-6, "µs": 1e-6, "ms": 1e-3, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _keep_alive_seconds(value):
+    """Seconds in an Ollama keep-alive (300, "30m", "1h30m"); negative = forever; None if unparsable."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    sign = -1.0 if value.startswith("-") else 1.0
+    body = value.lstrip("+-")
+    parts = _DURATION_PART.findall(body)
+    if not parts or "".join(n + unit for n, unit in parts) != body:
+        return None
+    return sign * sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+def _rewarm_after() -> float:
+    """Idle seconds after which the models are re-warmed (inf: never needed)."""
+    keep_alive = _keep_alive_seconds(OLLAMA_KEEP_ALIVE) if PREFIX_REUSE else _DEFAULT_KEEP_ALIVE
+    if keep_alive is None:
+        keep_alive = _DEFAULT_KEEP_ALIVE
+    if keep_alive <= 0:
+        return math.inf  # loaded for good (negative), or unloaded at once (0) anyway
+    return max(keep_alive - _REWARM_MARGIN, keep_alive / 2)
+
+
+_REWARM_AFTER = _rewarm_after()
+
+_last_activity = 0.0  # monotonic time of the last dictation or warm-up
+_last_dictation = time.monotonic()
+_wake = threading.Event()
+
+
+def _silent_wav(seconds: float = 0.5) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes(b"\0\0" * int(SAMPLE_RATE * seconds))
+    return buf.getvalue()
+
+
+_SILENCE = _silent_wav()
+
+
+def start():
+    """Warm both servers now, then keep them warm in the background."""
+    threading.Thread(target=_loop, daemon=True, name="voza-warmup").start()
+
+
+def touch():
+    """Note dictation activity (hotkey press).
+
+    If the models have sat idle long enough to be unloaded, warm them now —
+    the load then overlaps with the user speaking.
+    """
+    global _last_activity, _last_dictation
+    now = time.monotonic()
+    stale = now - _last_activity >= _REWARM_AFTER
+    _last_activity = _last_dictation = now
+    if stale:
+        _wake.set()
+
+
+def _loop():
+    global _last_activity
+    while True:
+        _warm_all()
+        _last_activity = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if _REWARM_AFTER == math.inf or now - _last_dictation >= _MAX_IDLE:
+                timeout = None  # nothing to keep up; wait for the next press
+            else:
+                timeout = _REWARM_AFTER - (now - _last_activity)
+                if timeout <= 0:
+                    break
+            if _wake.wait(timeout=timeout):
+                _wake.clear()
+                break
+
+
+def _warm_all():
+    wait([
+        health.pool.submit(_warm, health.whisper, _warm_whisper),
+        health.pool.submit(_warm, health.ollama, _warm_ollama),
+    ])
+
+
+def _warm(breaker, request):
+    if not breaker.allow():
+        return  # down; its prober is watching, and dictation uses the fallback
+    start = time.monotonic()
+    try:
+        request()
+    except Exception as e:
+        print(f"  [Warm-up] {breaker.name} failed: {e}")
+        return
+    print(f"  [Warm-up] {breaker.name} ready ({time.monotonic() - start:.2f}s)")
+
+
+def _warm_whisper():
+    resp = http.post(
+        f"{WHISPER_SERVER_URL}/inference",
+        files={"file": ("warmup.wav", _SILENCE, "audio/wav")},
+        data={"response_format": "json"},
+        timeout=_WARMUP_TIMEOUT,
+    )
+    resp.raise_for_status()
+
+
+def _warm_ollama():
+    if PREFIX_REUSE:
+        enhancer.warm_prefix()
+        return
+    # An empty prompt only loads the model (and applies keep_alive)
+    resp = http.post(
+        f"{OLLAMA_BASE_URL}/api/generate",
+        json={"model": LOCAL_CLEANUP_MODEL, "prompt": "", "keep_alive": OLLAMA_KEEP_ALIVE},
+        timeout=_WARMUP_TIMEOUT,
+    )
+    resp.raise_for_status()